@@ -0,0 +1,92 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.caches import LRUCache
+
+tokens = LRUCache(
+    maxsize=settings.TOKEN_AUTH_CACHE['MAXSIZE'],
+    ttl=settings.TOKEN_AUTH_CACHE['TTL'],
+)
+# Счётчик сбросов: запись, прочитанная до сброса, в кэш не попадает.
+generation = [0]
+# Метка отозванного токена в общем кэше. Пока она жива, add() не
+# положит в кэш запись, прочитанную из базы до отзыва.
+REVOKED = 'revoked'
+
+
+def shared_cache():
+    alias = settings.TOKEN_AUTH_CACHE['SHARED']
+    return caches[alias] if alias else None
+
+
+def shared_key(key):
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def forget_tokens(keys):
+    keys = list(keys)
+    generation[0] += 1
+    for key in keys:
+        tokens.delete(key)
+    shared = shared_cache()
+    if shared is not None and keys:
+        shared.set_many(
+            {shared_key(key): REVOKED for key in keys},
+            settings.TOKEN_AUTH_CACHE['TTL'],
+        )
+
+
+def forget_user_tokens(user_ids):
+    """Сбрасывает кэш токенов пользователей.
+
+    Нужен там, где пользователи меняются через QuerySet.update() и
+    сигнал post_save не приходит.
+    """
+    forget_tokens(Token.objects.filter(
+        user_id__in=user_ids
+    ).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кэшем токен -> (пользователь, токен).
+
+    Если задан алиас SHARED, записи хранятся только в общем кэше
+    воркеров: сброс в одном процессе сразу виден остальным. Без него
+    записи живут в LRU-кэше процесса, и другие процессы принимают
+    отозванный токен до истечения TTL.
+
+    Сигналы api.signals сбрасывают запись при удалении токена (выход,
+    удаление пользователя) и сохранении пользователя (смена пароля,
+    is_active). QuerySet.update() сигналов не шлёт, после него нужно
+    вызвать forget_user_tokens. Наружу отдаются копии объектов, так что
+    запрос не меняет закэшированные.
+    """
+
+    def authenticate_credentials(self, key):
+        shared = shared_cache()
+        if shared is not None:
+            cached = shared.get(shared_key(key))
+            if cached is None or cached == REVOKED:
+                revoked = cached == REVOKED
+                cached = super().authenticate_credentials(key)
+                if not revoked:
+                    shared.add(
+                        shared_key(key),
+                        cached,
+                        settings.TOKEN_AUTH_CACHE['TTL'],
+                    )
+        else:
+            cached = tokens.get(key)
+            if cached is None:
+                started = generation[0]
+                cached = super().authenticate_credentials(key)
+                if started == generation[0]:
+                    tokens.set(key, cached)
+        user, token = (copy.copy(value) for value in cached)
+        token.user = user
+        return user, token
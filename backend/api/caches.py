@@ -0,0 +1,174 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from recipes.models import Favorite, Follow, ShoppingList
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш с ограничением размера и временем жизни.
+
+    Размер считается функцией weigh (по умолчанию каждая запись весит 1),
+    при превышении maxsize вытесняются давно не использованные записи.
+    """
+
+    def __init__(self, maxsize, ttl=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires, weight = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.size -= weight
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = (
+            time.monotonic() + self.ttl if self.ttl is not None else None
+        )
+        weight = self.weigh(value) if self.weigh is not None else 1
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            if weight > self.maxsize:
+                return
+            self._data[key] = (value, expires, weight)
+            self.size += weight
+            while self.size > self.maxsize:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.size -= evicted
+
+    def delete(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self.size -= item[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+recipe_fragments = LRUCache(
+    maxsize=settings.RECIPE_FRAGMENT_CACHE['MAX_BYTES'],
+    weigh=lambda item: len(repr(item[1])),
+)
+
+
+def get_recipe_fragment(recipe, render):
+    """Общая для всех зрителей часть рецепта, версия - recipe.modified."""
+    cached = recipe_fragments.get(recipe.pk)
+    if cached is not None and cached[0] == recipe.modified:
+        return cached[1]
+    fragment = render(recipe)
+    recipe_fragments.set(recipe.pk, (recipe.modified, fragment))
+    return fragment
+
+
+class ViewerState:
+    """Избранное, корзина и подписки одного пользователя."""
+
+    __slots__ = ('favorites', 'shopping_cart', 'followings')
+
+    def __init__(self, favorites=(), shopping_cart=(), followings=()):
+        self.favorites = set(favorites)
+        self.shopping_cart = set(shopping_cart)
+        self.followings = set(followings)
+
+    @classmethod
+    def load(cls, user_id):
+        return cls(
+            favorites=Favorite.objects.filter(
+                user_id=user_id
+            ).values_list('recipe_id', flat=True),
+            shopping_cart=ShoppingList.objects.filter(
+                user_id=user_id
+            ).values_list('recipe_id', flat=True),
+            followings=Follow.objects.filter(
+                user_id=user_id
+            ).values_list('author_id', flat=True),
+        )
+
+
+ANONYMOUS_STATE = ViewerState()
+
+viewer_states = LRUCache(
+    maxsize=settings.VIEWER_STATE_CACHE['MAXSIZE'],
+    ttl=settings.VIEWER_STATE_CACHE['TTL'],
+)
+
+
+def viewer_versions():
+    """Общий кэш версий состояний или None, если кэш состояний выключен."""
+    alias = settings.VIEWER_STATE_CACHE['SHARED']
+    return caches[alias] if alias else None
+
+
+def viewer_version_key(user_id):
+    return f'viewer-state:{user_id}'
+
+
+def get_viewer_state(user):
+    """Состояние зрителя из кэша процесса, если его версия не менялась.
+
+    Версия хранится в общем кэше воркеров и меняется при каждой записи,
+    поэтому запись в одном процессе сразу делает устаревшими копии во
+    всех остальных.
+    """
+    if user is None or user.is_anonymous:
+        return ANONYMOUS_STATE
+    versions = viewer_versions()
+    if versions is None:
+        return ViewerState.load(user.pk)
+    key = viewer_version_key(user.pk)
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, uuid.uuid4().hex, None)
+        version = versions.get(key)
+    cached = viewer_states.get(user.pk)
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1]
+    state = ViewerState.load(user.pk)
+    if version is not None:
+        viewer_states.set(user.pk, (version, state))
+    return state
+
+
+def forget_viewer_states(user_ids):
+    """Меняет версии состояний пользователей после записи.
+
+    Версия меняется сразу и ещё раз после фиксации транзакции: иначе
+    другой воркер мог бы закэшировать под новой версией данные, которые
+    прочитал до фиксации.
+    """
+    versions = viewer_versions()
+    if versions is None:
+        return
+    keys = [viewer_version_key(user_id) for user_id in set(user_ids)]
+
+    def bump():
+        versions.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
@@ -0,0 +1,110 @@
+from django.db.models import Exists, OuterRef
+from django.utils.cache import quote_etag
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from recipes.models import (
+    Favorite,
+    Follow,
+    Recipe,
+    ShoppingList,
+    TableVersion,
+)
+
+VIEWER_FLAGS = ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+
+
+def table_validators(request, name):
+    """ETag, Last-Modified и номер версии таблицы, один запрос на запрос."""
+    versions = request.__dict__.setdefault('_table_versions', {})
+    if name not in versions:
+        version = TableVersion.objects.filter(name=name).first()
+        number = version.version if version else 0
+        versions[name] = (
+            quote_etag(f'{name}-{number}'),
+            version.modified if version else None,
+            number,
+        )
+    return versions[name]
+
+
+def table_etag(name):
+    def etag(request, *args, **kwargs):
+        return table_validators(request, name)[0]
+    return etag
+
+
+def table_last_modified(name):
+    def last_modified(request, *args, **kwargs):
+        return table_validators(request, name)[1]
+    return last_modified
+
+
+def recipe_validators(request, pk):
+    """Версия рецепта и флаги зрителя, вычисляются один раз на запрос.
+
+    Флаги читаются из базы тем же запросом, что и версия рецепта.
+    Last-Modified отдаётся только анонимам: у авторизованного зрителя
+    флаги меняются без изменения рецепта, их учитывает только ETag.
+    """
+    if not hasattr(request, '_recipe_validators'):
+        user = request.user
+        recipe = None
+        if str(pk).isdigit():
+            recipe = Recipe.objects.filter(pk=pk)
+            if user.is_authenticated:
+                recipe = recipe.annotate(
+                    is_favorited=Exists(Favorite.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )),
+                    is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )),
+                    is_subscribed=Exists(Follow.objects.filter(
+                        user=user, author=OuterRef('author_id')
+                    )),
+                )
+                recipe = recipe.values('modified', *VIEWER_FLAGS)
+            else:
+                recipe = recipe.values('modified')
+            recipe = recipe.first()
+        if recipe is None:
+            request._recipe_validators = (None, None)
+            return request._recipe_validators
+        flags = ''.join(
+            str(int(recipe.get(flag, False))) for flag in VIEWER_FLAGS
+        )
+        request._recipe_validators = (
+            quote_etag(
+                f'recipe-{pk}-{recipe["modified"].timestamp()}'
+                f'-{user.pk or 0}-{flags}'
+            ),
+            recipe['modified'] if user.is_anonymous else None,
+        )
+    return request._recipe_validators
+
+
+def recipe_etag(request, pk=None):
+    return recipe_validators(request, pk)[0]
+
+
+def recipe_last_modified(request, pk=None):
+    return recipe_validators(request, pk)[1]
+
+
+def table_conditional(name):
+    return condition(
+        etag_func=table_etag(name),
+        last_modified_func=table_last_modified(name),
+    )
+
+
+ingredient_conditional = table_conditional('ingredient')
+tag_conditional = table_conditional('tag')
+recipe_conditional = (
+    vary_on_headers('Authorization'),
+    condition(
+        etag_func=recipe_etag,
+        last_modified_func=recipe_last_modified,
+    ),
+)
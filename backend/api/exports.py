@@ -0,0 +1,119 @@
+import csv
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from recipes.constants import (
+    FILE_SHOPPING_LIST,
+    SHOPPING_LIST_FORMATS,
+    SHOPPING_LIST_TITLE,
+)
+
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 18
+PDF_MARGIN = 50
+SPOOL_SIZE = 2 ** 20
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def item_line(item):
+    return (
+        f"{item['ingredient__name']} "
+        f"({item['ingredient__measurement_unit']}) - {item['amount']}"
+    )
+
+
+def txt_rows(items):
+    yield SHOPPING_LIST_TITLE
+    for item in items:
+        yield f'\n{item_line(item)}'
+
+
+def csv_rows(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for item in items:
+        yield writer.writerow((
+            item['ingredient__name'],
+            item['ingredient__measurement_unit'],
+            item['amount'],
+        ))
+
+
+def json_rows(items):
+    separator = '['
+    for item in items:
+        yield separator + json.dumps({
+            'name': item['ingredient__name'],
+            'measurement_unit': item['ingredient__measurement_unit'],
+            'amount': item['amount'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+def pdf_font():
+    path = settings.SHOPPING_LIST_PDF_FONT
+    if not os.path.exists(path):
+        return 'Helvetica'
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+def pdf_file(items):
+    """Пишет PDF во временный файл, который уходит на диск после 1 МБ."""
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    canvas = Canvas(file, pagesize=A4)
+    font = pdf_font()
+    _, height = A4
+    y = height - PDF_MARGIN
+    canvas.setFont(font, PDF_FONT_SIZE + 4)
+    canvas.drawString(PDF_MARGIN, y, SHOPPING_LIST_TITLE)
+    canvas.setFont(font, PDF_FONT_SIZE)
+    for item in items:
+        y -= PDF_LINE_HEIGHT
+        if y < PDF_MARGIN:
+            canvas.showPage()
+            canvas.setFont(font, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        canvas.drawString(PDF_MARGIN, y, f'- {item_line(item)}')
+    canvas.save()
+    file.seek(0)
+    return file
+
+
+STREAMS = {
+    'txt': txt_rows,
+    'csv': csv_rows,
+    'json': json_rows,
+}
+
+
+def shopping_list_response(items, file_format):
+    filename = f'{FILE_SHOPPING_LIST}.{file_format}'
+    content_type = SHOPPING_LIST_FORMATS[file_format]
+    if file_format == 'pdf':
+        return FileResponse(
+            pdf_file(items),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+    response = StreamingHttpResponse(
+        STREAMS[file_format](items), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,127 @@
+import base64
+import binascii
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+IMAGE_EXTENSIONS = {'png': 'png', 'jpeg': 'jpg', 'gif': 'gif', 'webp': 'webp'}
+# MPO (снимки многих камер телефонов) - JPEG с дополнительными кадрами.
+IMAGE_FORMAT_ALIASES = {'MPO': 'JPEG'}
+SNIFF_BYTES = 16
+
+
+def sniff_format(head):
+    """Определяет формат изображения по первым байтам файла."""
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class StreamingImageField(serializers.ImageField):
+    """Изображение в base64 или файлом multipart-запроса.
+
+    base64 декодируется частями во временный файл (небольшие файлы
+    остаются в памяти, как и при обычной загрузке), формат и размеры
+    проверяются по заголовку до декодирования пикселей.
+    """
+
+    default_error_messages = {
+        'invalid_base64': 'Please upload a valid base64 encoded image.',
+        'invalid_image': 'Please upload a valid image.',
+        'unsupported': 'Supported image formats: png, jpeg, gif, webp.',
+        'too_large': 'Image must not exceed {max_bytes} bytes.',
+        'too_many_pixels': 'Image must not exceed {max_pixels} pixels.',
+    }
+
+    def to_internal_value(self, data):
+        limits = settings.IMAGE_UPLOAD
+        if isinstance(data, str):
+            data = self.decode(data, limits)
+        elif not isinstance(data, UploadedFile):
+            self.fail('invalid_image')
+        elif data.size > limits['MAX_BYTES']:
+            self.fail('too_large', max_bytes=limits['MAX_BYTES'])
+        else:
+            data.seek(0)
+            if sniff_format(data.read(SNIFF_BYTES)) is None:
+                self.fail('unsupported')
+        data.content_type = Image.MIME[self.check_image(data, limits)]
+        return serializers.FileField.to_internal_value(self, data)
+
+    def decode(self, data, limits):
+        header, separator, encoded = data.partition(';base64,')
+        if not separator:
+            encoded = header
+        if len(encoded) * 3 // 4 > limits['MAX_BYTES'] + 3:
+            self.fail('too_large', max_bytes=limits['MAX_BYTES'])
+        chunk_size = limits['CHUNK_SIZE']
+        file = None
+        rest = ''
+        size = 0
+        try:
+            for start in range(0, len(encoded), chunk_size):
+                chunk = rest + ''.join(
+                    encoded[start:start + chunk_size].split()
+                )
+                end = len(chunk) // 4 * 4
+                chunk, rest = chunk[:end], chunk[end:]
+                decoded = base64.b64decode(chunk, validate=True)
+                size += len(decoded)
+                if size > limits['MAX_BYTES']:
+                    self.fail('too_large', max_bytes=limits['MAX_BYTES'])
+                if file is None:
+                    image_format = sniff_format(decoded)
+                    if image_format is None:
+                        self.fail('unsupported')
+                    file = UploadedFile(
+                        tempfile.SpooledTemporaryFile(
+                            settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+                        ),
+                        f'{uuid.uuid4()}.{IMAGE_EXTENSIONS[image_format]}',
+                    )
+                file.write(decoded)
+            if file is None or rest:
+                self.fail('invalid_base64')
+        except (binascii.Error, serializers.ValidationError) as error:
+            if file is not None:
+                file.close()
+            if isinstance(error, binascii.Error):
+                self.fail('invalid_base64')
+            raise
+        file.size = size
+        file.seek(0)
+        return file
+
+    def check_image(self, file, limits):
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                if width * height > limits['MAX_PIXELS']:
+                    self.fail(
+                        'too_many_pixels', max_pixels=limits['MAX_PIXELS']
+                    )
+                image_format = IMAGE_FORMAT_ALIASES.get(
+                    image.format, image.format
+                )
+                image.verify()
+        except (UnidentifiedImageError, Image.DecompressionBombError,
+                OSError, SyntaxError):
+            self.fail('invalid_image')
+        if image_format.lower() not in IMAGE_EXTENSIONS:
+            self.fail('unsupported')
+        file.seek(0)
+        return image_format
@@ -1,6 +1,14 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
+from django_filters.widgets import QueryArrayWidget
 
-from recipes.models import Ingredient, Recipe
+from api.indexes import tag_map
+from recipes.constants import TAGS_MODE_ALL, TAGS_MODE_ANY, TAGS_MODES
+from recipes.models import Ingredient, Recipe, User
+from recipes.search import search_recipes
+
+RecipeTag = Recipe.tags.through
 
 
 class IngredientFilter(FilterSet):
@@ -11,17 +19,74 @@ class IngredientFilter(FilterSet):
         fields = ('name',)
 
 
+class UserFilter(FilterSet):
+    username = filters.CharFilter(lookup_expr='istartswith')
+
+    class Meta:
+        model = User
+        fields = ('username',)
+
+
+class SlugListField(forms.Field):
+    """Список slug: ?tags=a&tags=b или ?tags=a,b."""
+
+    widget = QueryArrayWidget
+
+    def to_python(self, value):
+        return [
+            slug
+            for values in value or () for slug in values.split(',') if slug
+        ]
+
+
+class SlugListFilter(filters.Filter):
+    field_class = SlugListField
+
+
+def tag_ids(slugs, mode=TAGS_MODE_ANY):
+    """id тегов по slug из кэша; пустой список - подходящих рецептов нет."""
+    slugs = set(slugs)
+    ids = tag_map.ids(slugs)
+    if mode == TAGS_MODE_ALL and len(ids) < len(slugs):
+        return []
+    return ids
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = SlugListFilter(method='tags_filter')
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES,
+        method='tags_mode_filter',
+    )
     is_favorited = filters.BooleanFilter(method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter'
     )
+    search = filters.CharFilter(method='search_filter')
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
 
+    def tags_filter(self, queryset, name, value):
+        mode = self.form.cleaned_data.get('tags_mode') or TAGS_MODE_ANY
+        ids = tag_ids(value, mode)
+        if not ids:
+            return queryset.none()
+        if mode == TAGS_MODE_ANY:
+            return queryset.filter(Exists(RecipeTag.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id__in=ids
+            )))
+        for tag_id in ids:
+            queryset = queryset.filter(Exists(RecipeTag.objects.filter(
+                recipe_id=OuterRef('pk'), tag_id=tag_id
+            )))
+        return queryset
+
+    def tags_mode_filter(self, queryset, name, value):
+        # Режим учитывается в tags_filter.
+        return queryset
+
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user.pk
         if value:
@@ -33,3 +98,6 @@ class RecipeFilter(FilterSet):
         if value:
             return queryset.filter(shopping_lists__user=user)
         return queryset
+
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
@@ -0,0 +1,410 @@
+import datetime
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Max
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    TableVersion,
+    Tag,
+)
+
+WORD_START = re.compile(r'\b\w')
+
+
+def word_starts(name):
+    return {0, *(match.start() for match in WORD_START.finditer(name))}
+
+
+class IngredientIndex:
+    """Отсортированный индекс начал слов в названиях ингредиентов.
+
+    Каждое название раскладывается на суффиксы, начинающиеся с границы
+    слова. Бинарный поиск по префиксу запроса находит и совпадения с
+    начала названия (offset == 0), и совпадения внутри него.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.checked = 0
+        self.version = None
+        self._data = ((), (), ())
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        return TableVersion.objects.filter(
+            name='ingredient'
+        ).values_list('version', flat=True).first() or 0
+
+    def build(self, version=None):
+        if version is None:
+            version = self.current_version()
+        rows = list(Ingredient.objects.order_by('name', 'id').values(
+            'id', 'name', 'measurement_unit'
+        ))
+        suffixes = sorted(
+            (name[offset:], offset, position)
+            for position, name in enumerate(
+                row['name'].casefold() for row in rows
+            )
+            for offset in word_starts(name)
+        )
+        self._data = (
+            [suffix for suffix, _, _ in suffixes],
+            [(offset, position) for _, offset, position in suffixes],
+            rows,
+        )
+        self.version = version
+        self.checked = time.monotonic()
+
+    def refresh(self, version=None):
+        """Перестраивает индекс, если версия таблицы сменилась.
+
+        version - уже прочитанная версия (например, для ETag): индекс
+        старее неё перестраивается сразу, без ожидания check_interval.
+        """
+        if version is not None:
+            if self.version is not None and version <= self.version:
+                return
+            with self._lock:
+                if self.version is None or version > self.version:
+                    self.build()
+            return
+        if time.monotonic() - self.checked < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self.checked < self.check_interval:
+                return
+            version = self.current_version()
+            if version != self.version:
+                self.build(version)
+            else:
+                self.checked = time.monotonic()
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+
+    def search(self, query, limit=None, version=None):
+        self.refresh(version)
+        keys, entries, rows = self._data
+        query = query.strip().casefold()
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + chr(0x10FFFF), start)
+        prefix, infix = set(), set()
+        for offset, position in entries[start:end]:
+            (infix if offset else prefix).add(position)
+        found = sorted(prefix) + sorted(infix - prefix)
+        return [rows[position] for position in found[:limit]]
+
+
+ingredient_index = IngredientIndex(
+    check_interval=settings.INGREDIENT_INDEX_CHECK_INTERVAL
+)
+
+
+class TagMap:
+    """Соответствие slug -> id тегов, перечитывается со сменой версии."""
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.checked = 0
+        self.version = None
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        return TableVersion.objects.filter(
+            name='tag'
+        ).values_list('version', flat=True).first() or 0
+
+    def refresh(self):
+        if time.monotonic() - self.checked < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self.checked < self.check_interval:
+                return
+            version = self.current_version()
+            if version != self.version:
+                self._ids = dict(Tag.objects.values_list('slug', 'id'))
+                self.version = version
+            self.checked = time.monotonic()
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+
+    def ids(self, slugs):
+        """id известных тегов из slugs, неизвестные пропускаются."""
+        self.refresh()
+        return [self._ids[slug] for slug in slugs if slug in self._ids]
+
+
+tag_map = TagMap(check_interval=settings.TAG_MAP_CHECK_INTERVAL)
+
+RecipeTag = Recipe.tags.through
+
+# Рецепты делятся на блоки по CHUNK_BITS идентификаторов, бит в числе
+# блока - рецепт с id = номер блока * CHUNK_BITS + позиция бита.
+CHUNK_SHIFT = 12
+CHUNK_BITS = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_BITS - 1
+
+
+def to_bits(positions):
+    data = bytearray(CHUNK_BITS // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+def from_bits(chunk, bits):
+    """Идентификаторы рецептов блока по убыванию."""
+    base = chunk << CHUNK_SHIFT
+    while bits:
+        position = bits.bit_length() - 1
+        bits ^= 1 << position
+        yield base + position
+
+
+def add_planes(planes, bits):
+    """Прибавляет единицу к побитовым счётчикам рецептов из bits."""
+    for plane, value in enumerate(planes):
+        if not bits:
+            return
+        planes[plane], bits = value ^ bits, value & bits
+    if bits:
+        planes.append(bits)
+
+
+def subtract_planes(minuend, subtrahend):
+    difference = []
+    borrow = 0
+    for plane in range(max(len(minuend), len(subtrahend))):
+        first = minuend[plane] if plane < len(minuend) else 0
+        second = subtrahend[plane] if plane < len(subtrahend) else 0
+        difference.append(first ^ second ^ borrow)
+        borrow = (~first & second) | (~(first ^ second) & borrow)
+    return difference
+
+
+def equal_planes(planes, value, bits):
+    """Рецепты из bits, у которых счётчик равен value."""
+    if value >> len(planes):
+        return 0
+    for plane, plane_bits in enumerate(planes):
+        bits &= plane_bits if value >> plane & 1 else ~plane_bits
+    return bits
+
+
+class PantryIndex:
+    """Инвертированный индекс ингредиент -> битовая карта рецептов.
+
+    Карты разбиты на блоки и хранятся как целые числа Python, поэтому
+    пересечения и объединения выполняются побитовыми операциями сразу
+    над тысячами рецептов. Число ингредиентов рецепта хранится
+    побитовыми срезами, так что число недостающих ингредиентов для
+    всего блока считается несколькими операциями вычитания.
+
+    Изменённые рецепты подхватываются по полю modified, удаление
+    рецепта меняет версию таблицы и ведёт к полной перестройке.
+    """
+
+    def __init__(self, check_interval, overlap):
+        self.check_interval = check_interval
+        self.overlap = overlap
+        self.checked = 0
+        self.version = None
+        self.watermark = None
+        self._chunks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        return TableVersion.objects.filter(
+            name='recipe'
+        ).values_list('version', flat=True).first() or 0
+
+    @staticmethod
+    def load(recipe_ids=None):
+        """Блоки {номер: (ингредиенты, теги, размеры)} по данным базы."""
+        ingredients = RecipeIngredient.objects.order_by()
+        tags = RecipeTag.objects.order_by()
+        if recipe_ids is not None:
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+            tags = tags.filter(recipe_id__in=recipe_ids)
+        recipes = {}
+        for recipe_id, ingredient_id in ingredients.values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator():
+            recipes.setdefault(recipe_id, set()).add(ingredient_id)
+        grouped = {}
+        for recipe_id, recipe_ingredients in recipes.items():
+            postings, _, sizes = grouped.setdefault(
+                recipe_id >> CHUNK_SHIFT, ({}, {}, {})
+            )
+            position = recipe_id & CHUNK_MASK
+            for ingredient_id in recipe_ingredients:
+                postings.setdefault(ingredient_id, []).append(position)
+            sizes[position] = len(recipe_ingredients)
+        for recipe_id, tag_id in tags.values_list(
+            'recipe_id', 'tag_id'
+        ).iterator():
+            if recipe_id in recipes:
+                grouped[recipe_id >> CHUNK_SHIFT][1].setdefault(
+                    tag_id, []
+                ).append(recipe_id & CHUNK_MASK)
+        chunks = {}
+        for chunk, (postings, tag_positions, sizes) in grouped.items():
+            planes = [
+                to_bits(
+                    position for position, size in sizes.items()
+                    if size >> plane & 1
+                )
+                for plane in range(max(sizes.values()).bit_length())
+            ]
+            chunks[chunk] = (
+                {key: to_bits(value) for key, value in postings.items()},
+                {key: to_bits(value) for key, value in tag_positions.items()},
+                planes,
+            )
+        return chunks
+
+    def build(self, version=None):
+        if version is None:
+            version = self.current_version()
+        watermark = Recipe.objects.aggregate(Max('modified'))['modified__max']
+        self._chunks = self.load()
+        self.version = version
+        self.watermark = watermark
+        self.checked = time.monotonic()
+
+    def update(self, recipe_ids):
+        """Перечитывает из базы указанные рецепты."""
+        recipe_ids = set(recipe_ids)
+        loaded = self.load(recipe_ids)
+        with self._lock:
+            chunks = dict(self._chunks)
+            touched = {recipe_id >> CHUNK_SHIFT for recipe_id in recipe_ids}
+            for chunk in touched:
+                keep = ~to_bits(
+                    recipe_id & CHUNK_MASK for recipe_id in recipe_ids
+                    if recipe_id >> CHUNK_SHIFT == chunk
+                )
+                postings, tags, planes = chunks.get(chunk, ({}, {}, []))
+                postings = {
+                    key: bits & keep for key, bits in postings.items()
+                    if bits & keep
+                }
+                tags = {
+                    key: bits & keep for key, bits in tags.items()
+                    if bits & keep
+                }
+                planes = [bits & keep for bits in planes]
+                new_postings, new_tags, new_planes = loaded.get(
+                    chunk, ({}, {}, [])
+                )
+                for key, bits in new_postings.items():
+                    postings[key] = postings.get(key, 0) | bits
+                for key, bits in new_tags.items():
+                    tags[key] = tags.get(key, 0) | bits
+                planes.extend([0] * (len(new_planes) - len(planes)))
+                for plane, bits in enumerate(new_planes):
+                    planes[plane] |= bits
+                chunks[chunk] = (postings, tags, planes)
+            self._chunks = chunks
+
+    def refresh(self):
+        if time.monotonic() - self.checked < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self.checked < self.check_interval:
+                return
+            version = self.current_version()
+            if version != self.version or self.watermark is None:
+                self.build(version)
+                return
+            changed = dict(Recipe.objects.filter(
+                modified__gte=self.watermark - self.overlap
+            ).values_list('id', 'modified'))
+            self.checked = time.monotonic()
+        if changed:
+            self.update(changed)
+            self.watermark = max(self.watermark, *changed.values())
+
+    def warm(self):
+        try:
+            self.refresh()
+        except DatabaseError:
+            pass
+
+    def search(self, ingredient_ids, max_missing, tag_ids=None,
+               all_tags=False, recipe_ids=None):
+        """Рецепты, где есть хотя бы один из ингредиентов и не хватает
+        не больше max_missing: [(id рецепта, недостаёт)].
+
+        Сортировка по числу недостающих ингредиентов, затем по убыванию
+        id. tag_ids оставляет рецепты с любым из тегов (со всеми, если
+        all_tags), recipe_ids - только перечисленные рецепты.
+        """
+        self.refresh()
+        # Повтор ингредиента посчитался бы дважды и сломал вычитание.
+        ingredient_ids = set(ingredient_ids)
+        allowed = None
+        if recipe_ids is not None:
+            allowed = {}
+            for recipe_id in recipe_ids:
+                allowed.setdefault(recipe_id >> CHUNK_SHIFT, []).append(
+                    recipe_id & CHUNK_MASK
+                )
+        found = [[] for _ in range(max_missing + 1)]
+        chunks = self._chunks
+        for chunk in sorted(chunks, reverse=True):
+            postings, tags, planes = chunks[chunk]
+            have = []
+            matched = 0
+            for ingredient_id in ingredient_ids:
+                bits = postings.get(ingredient_id, 0)
+                matched |= bits
+                add_planes(have, bits)
+            if tag_ids is not None:
+                tagged = matched if all_tags and tag_ids else 0
+                for tag_id in tag_ids:
+                    if all_tags:
+                        tagged &= tags.get(tag_id, 0)
+                    else:
+                        tagged |= tags.get(tag_id, 0)
+                matched &= tagged
+            if allowed is not None:
+                matched &= to_bits(allowed.get(chunk, ()))
+            if not matched:
+                continue
+            missing = subtract_planes(planes, have)
+            for count, recipes in enumerate(found):
+                recipes.extend(from_bits(
+                    chunk, equal_planes(missing, count, matched)
+                ))
+        return [
+            (recipe_id, count)
+            for count, recipes in enumerate(found)
+            for recipe_id in recipes
+        ]
+
+
+pantry_index = PantryIndex(
+    check_interval=settings.PANTRY_INDEX['CHECK_INTERVAL'],
+    overlap=datetime.timedelta(seconds=settings.PANTRY_INDEX['OVERLAP']),
+)
@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication, tokens
+from recipes.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер аутентификации по токену без кэша и с кэшем. Пользователи '
+        'создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(
+                    username=f'bench_auth{number}',
+                    email=f'bench_auth{number}@localhost',
+                )
+                for number in range(options['users'])
+            )
+            users = User.objects.filter(username__startswith='bench_auth')
+            keys = [Token.objects.create(user=user).key for user in users]
+            requests = [
+                factory.get(
+                    '/api/users/me/', HTTP_AUTHORIZATION=f'Token {key}'
+                )
+                for key in keys
+            ]
+            tokens.clear()
+            self.stdout.write('backend        queries/req  median_us  p95_us')
+            local = override_settings(
+                TOKEN_AUTH_CACHE=dict(settings.TOKEN_AUTH_CACHE, SHARED='')
+            )
+            for name, backend, overrides in (
+                ('token', TokenAuthentication(), None),
+                ('cached_shared', CachedTokenAuthentication(), None),
+                ('cached_local', CachedTokenAuthentication(), local),
+            ):
+                timings = []
+                queries = []
+                if overrides is not None:
+                    overrides.enable()
+                with connection.execute_wrapper(
+                    lambda execute, *args: queries.append(1) or execute(*args)
+                ):
+                    for number in range(options['requests']):
+                        request = requests[number % len(requests)]
+                        started = time.perf_counter()
+                        backend.authenticate(request)
+                        timings.append(
+                            (time.perf_counter() - started) * 10 ** 6
+                        )
+                if overrides is not None:
+                    overrides.disable()
+                timings.sort()
+                self.stdout.write(
+                    f'{name:13s}  '
+                    f'{len(queries) / options["requests"]:11.3f}  '
+                    f'{statistics.median(timings):9.1f}  '
+                    f'{timings[int(len(timings) * 0.95) - 1]:6.1f}'
+                )
+            tokens.clear()
+            transaction.set_rollback(True)
@@ -0,0 +1,133 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+from recipes.constants import (
+    CURSOR_PAGINATION,
+    PAGE_SIZE_MAX,
+    PAGINATION_PARAM,
+)
+
+
+class RecipeCursorPagination(CursorPagination):
+    ordering = ('-pub_date', 'id')
+    page_size_query_param = 'limit'
+    max_page_size = PAGE_SIZE_MAX
+
+
+class RecipePagination(PageNumberPagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(PAGINATION_PARAM) == CURSOR_PAGINATION
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response_schema(
+                schema
+            )
+        return super().get_paginated_response_schema(schema)
+
+
+class ForwardCursorPagination(CursorPagination):
+    """Курсор с позицией из составного ключа, только вперёд."""
+
+    page_size_query_param = 'limit'
+    max_page_size = PAGE_SIZE_MAX
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        return None
+
+
+class FeedPagination(ForwardCursorPagination):
+    """Курсор по ключу (pub_date, id) для ленты, только вперёд.
+
+    Ключи выбирает переданная функция fetch(key, limit), поэтому лента
+    может собираться из нескольких источников.
+    """
+
+    def paginate_keys(self, fetch, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        key = None
+        if cursor is not None:
+            pub_date, _, recipe_id = cursor.position.partition('|')
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None or not recipe_id.isdigit():
+                raise NotFound(self.invalid_cursor_message)
+            key = (pub_date, int(recipe_id))
+        keys = fetch(key, self.page_size + 1)
+        self.has_next = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            pub_date, recipe_id = keys[-1]
+            self.next_position = f'{pub_date.isoformat()}|{recipe_id}'
+        return keys
+
+
+class UserCursorPagination(ForwardCursorPagination):
+    """Курсор по ключу (username, id) для списка пользователей."""
+
+    ordering = ('username', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            username, _, user_id = cursor.position.rpartition('|')
+            if not user_id.isdigit():
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(
+                Q(username__gt=username)
+                | Q(username=username, id__gt=int(user_id))
+            )
+        users = list(
+            queryset.order_by(*self.ordering)[:self.page_size + 1]
+        )
+        self.has_next = len(users) > self.page_size
+        users = users[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = f'{users[-1].username}|{users[-1].id}'
+        return users
+
+
+class UserPagination(RecipePagination):
+    cursor_pagination_class = UserCursorPagination
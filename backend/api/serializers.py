@@ -1,11 +1,15 @@
-from drf_extra_fields.fields import Base64ImageField
+from collections import Counter
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from rest_framework import serializers
 from djoser.serializers import UserSerializer, UserCreateSerializer
 
+from api.caches import get_recipe_fragment, get_viewer_state
+from api.fields import StreamingImageField
+from api.indexes import pantry_index
+from jobs.models import Job
 from recipes.models import (
-    ShoppingList,
     RecipeIngredient,
     Ingredient,
     Favorite,
@@ -14,14 +18,37 @@ from recipes.models import (
     Tag,
 )
 from recipes.constants import (
+    BATCH_MAX_RECIPES,
+    BATCH_MAX_USERS,
     FOLLOW_EXISTS,
     FOLLOW_YOURSELF,
+    PANTRY_MAX_INGREDIENTS,
+    PANTRY_MISSING_DEFAULT,
+    PANTRY_MISSING_MAX,
 )
+from recipes.cart import change_recipe
+from recipes.images import generate_variants, variant_urls
+from recipes.signals import recipe_saved
 
 
 User = get_user_model()
 
 
+def viewer(context):
+    """Авторизованный пользователь запроса или None."""
+    request = context.get('request')
+    if request is None or request.user.is_anonymous:
+        return None
+    return request.user
+
+
+def viewer_state(context):
+    """Состояние зрителя, одно на весь запрос."""
+    if 'viewer_state' not in context:
+        context['viewer_state'] = get_viewer_state(viewer(context))
+    return context['viewer_state']
+
+
 class UserCreateSerializer(UserCreateSerializer):
     class Meta:
         model = User
@@ -53,8 +80,25 @@ class UserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        return Follow.objects.filter(user=user, author=obj.id).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in viewer_state(self.context).followings
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            'id',
+            'name',
+            'status',
+            'attempts',
+            'run_at',
+            'result',
+            'error',
+            'created',
+            'modified',
+        )
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -70,6 +114,9 @@ class FavoriteSerializer(serializers.ModelSerializer):
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
+    )
 
     class Meta:
         model = Recipe
@@ -77,9 +124,96 @@ class RecipeShortSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
+
+class UserBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=BATCH_MAX_USERS,
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=BATCH_MAX_RECIPES,
+        required=False,
+    )
+    tags = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+    author = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate(self, data):
+        if not any(data.get(field) for field in ('ids', 'tags', 'author')):
+            raise serializers.ValidationError(
+                'Pass recipe ids or a tags/author filter'
+            )
+        if not data.get('ids'):
+            # Фильтр раскрывается в список id с тем же ограничением.
+            ids = list(self.filter_recipes(data).values_list(
+                'id', flat=True
+            )[:BATCH_MAX_RECIPES + 1])
+            if len(ids) > BATCH_MAX_RECIPES:
+                raise serializers.ValidationError(
+                    f'Filter matches more than {BATCH_MAX_RECIPES} '
+                    'recipes, pass recipe ids'
+                )
+            data['ids'] = sorted(ids)
+        return data
+
+    @staticmethod
+    def filter_recipes(data):
+        recipes = Recipe.objects.all()
+        if data.get('ids'):
+            recipes = recipes.filter(id__in=data['ids'])
+        if data.get('tags'):
+            recipes = recipes.filter(tags__slug__in=data['tags'])
+        if 'author' in data:
+            recipes = recipes.filter(author_id=data['author'])
+        return recipes.order_by().distinct()
+
+    def get_recipes(self):
+        return self.filter_recipes(self.validated_data)
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=PANTRY_MAX_INGREDIENTS,
+        allow_empty=False,
+    )
+    max_missing = serializers.IntegerField(
+        min_value=0,
+        max_value=PANTRY_MISSING_MAX,
+        default=PANTRY_MISSING_DEFAULT,
+    )
+
+    def to_internal_value(self, data):
+        data = data.copy()
+        data.setlist('ingredients', [
+            value
+            for values in data.getlist('ingredients')
+            for value in values.split(',') if value
+        ])
+        return super().to_internal_value(data)
+
+    def validate_ingredients(self, value):
+        return list(dict.fromkeys(value))
+
 
 class FollowSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(
@@ -112,11 +246,15 @@ class FollowSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        return Follow.objects.filter(
-            user=user, author=obj.id).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.author_id in viewer_state(self.context).followings
 
     def get_recipes(self, obj):
+        if 'recipes' in self.context:
+            return RecipeShortSerializer(
+                self.context['recipes'].get(obj.author_id, ()), many=True
+            ).data
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
         queryset = obj.author.recipes.all()
@@ -125,7 +263,7 @@ class FollowSerializer(serializers.ModelSerializer):
         return RecipeShortSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
-        return obj.author.recipes.all().count()
+        return obj.author.recipes_count
 
 
 class FollowValidateSerializer(serializers.ModelSerializer):
@@ -168,13 +306,63 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(required=True)
-    author = UserSerializer()
+class RecipeAuthorSerializer(UserSerializer):
+    """Автор во фрагменте рецепта, без зависящего от зрителя флага."""
+
+    class Meta(UserSerializer.Meta):
+        fields = tuple(
+            field for field in UserSerializer.Meta.fields
+            if field != 'is_subscribed'
+        )
+
+
+class RecipeFragmentSerializer(serializers.ModelSerializer):
+    """Общая для всех зрителей часть рецепта.
+
+    Кэшируется в api.caches.recipe_fragments, поэтому не содержит
+    флагов зрителя и адресов, зависящих от запроса.
+    """
+
+    author = RecipeAuthorSerializer()
     tags = TagSerializer(many=True)
     ingredients = serializers.SerializerMethodField(
         method_name='get_ingredients'
     )
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id',
+            'tags',
+            'author',
+            'ingredients',
+            'name',
+            'image',
+            'image_variants',
+            'text',
+            'cooking_time'
+        )
+
+    def get_ingredients(self, obj):
+        return RecipeIngredientSerializer(
+            obj.ingredient_recipes.all(),
+            many=True
+        ).data
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants)
+
+    def to_representation(self, instance):
+        fragment = super().to_representation(instance)
+        fragment['image'] = instance.image.url if instance.image else None
+        return fragment
+
+
+class RecipeSerializer(RecipeFragmentSerializer):
+    image = StreamingImageField(required=True)
     is_favorited = serializers.SerializerMethodField(
         method_name='get_is_favorited'
     )
@@ -193,31 +381,55 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         )
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=request.user, recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return obj.pk in viewer_state(self.context).favorites
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return ShoppingList.objects.filter(
-            user=request.user, recipe_id=obj
-        ).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return obj.pk in viewer_state(self.context).shopping_cart
 
-    def get_ingredients(self, obj):
-        return RecipeIngredientSerializer(
-            obj.ingredient_recipes,
-            many=True
-        ).data
+    def get_author_subscribed(self, obj):
+        if hasattr(obj, 'author_subscribed'):
+            return obj.author_subscribed
+        return obj.author_id in viewer_state(self.context).followings
+
+    @staticmethod
+    def render_fragment(instance):
+        return RecipeFragmentSerializer(instance).data
+
+    def to_representation(self, instance):
+        # Флаги зрителя и абсолютный адрес картинки не кэшируются,
+        # они подставляются поверх общего фрагмента.
+        fragment = get_recipe_fragment(instance, self.render_fragment)
+        request = self.context.get('request')
+        data = {
+            field: fragment.get(field) for field in self.Meta.fields
+        }
+        data['author'] = dict(
+            fragment['author'],
+            is_subscribed=self.get_author_subscribed(instance),
+        )
+        data['is_favorited'] = self.get_is_favorited(instance)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(instance)
+        if request is not None:
+            if data['image']:
+                data['image'] = request.build_absolute_uri(data['image'])
+            data['image_variants'] = {
+                variant: {
+                    fmt: request.build_absolute_uri(url)
+                    for fmt, url in formats.items()
+                }
+                for variant, formats in fragment['image_variants'].items()
+            }
+        return data
 
 
 class IngredientinRecipeCreate(serializers.ModelSerializer):
@@ -232,7 +444,7 @@ class IngredientinRecipeCreate(serializers.ModelSerializer):
 
 class RecipeCreateSerializers(serializers.ModelSerializer):
     ingredients = IngredientinRecipeCreate(many=True)
-    image = Base64ImageField(required=True)
+    image = StreamingImageField(required=True)
 
     class Meta:
         model = Recipe
@@ -269,17 +481,87 @@ class RecipeCreateSerializers(serializers.ModelSerializer):
         )
         recipe.tags.set(tags)
         self.__create_ingredients(recipe, ingredients)
+        generate_variants(recipe)
+        recipe_saved.send(sender=Recipe, instance=recipe, created=True)
+        transaction.on_commit(lambda: pantry_index.update((recipe.pk,)))
         return recipe
 
+    @staticmethod
+    def __update_tags(recipe, tags):
+        current = set(recipe.tags.values_list('id', flat=True))
+        wanted = {tag.pk for tag in tags}
+        if current == wanted:
+            return False
+        recipe.tags.remove(*(current - wanted))
+        recipe.tags.add(*(wanted - current))
+        return True
+
+    @staticmethod
+    def __update_ingredients(recipe, ingredients):
+        """Записывает только разницу, возвращает изменения количеств."""
+        current = {
+            row.ingredient_id: row for row in recipe.ingredient_recipes.all()
+        }
+        wanted = {
+            ingredient['id'].pk: ingredient['amount']
+            for ingredient in ingredients
+        }
+        deltas = Counter()
+        changed = []
+        for ingredient_id, amount in wanted.items():
+            row = current.get(ingredient_id)
+            if row is None:
+                deltas[ingredient_id] = amount
+            elif row.amount != amount:
+                deltas[ingredient_id] = amount - row.amount
+                row.amount = amount
+                changed.append(row)
+        removed = [
+            row for ingredient_id, row in current.items()
+            if ingredient_id not in wanted
+        ]
+        for row in removed:
+            deltas[row.ingredient_id] = -row.amount
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in wanted.items()
+            if ingredient_id not in current
+        )
+        if removed:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in removed]
+            ).delete()
+        return deltas
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        instance.tags.clear()
-        instance.ingredient_recipes.all().delete()
-        instance.tags.set(tags)
-        self.__create_ingredients(instance, ingredients)
-        return super().update(instance, validated_data)
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        changed = {
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        }
+        if tags is not None and self.__update_tags(instance, tags):
+            changed.add('tags')
+        if ingredients is not None:
+            deltas = self.__update_ingredients(instance, ingredients)
+            if deltas:
+                change_recipe(instance, deltas)
+                changed.add('ingredients')
+        instance = super().update(instance, validated_data)
+        if 'image' in changed:
+            generate_variants(instance)
+        recipe_saved.send(
+            sender=Recipe, instance=instance, created=False, changed=changed
+        )
+        if changed & {'tags', 'ingredients'}:
+            transaction.on_commit(
+                lambda: pantry_index.update((instance.pk,))
+            )
+        return instance
 
     def to_representation(self, instance):
         return RecipeSerializer(
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_tokens, forget_user_tokens
+from api.caches import forget_viewer_states
+from recipes.models import Favorite, Follow, ShoppingList
+from recipes.signals import relations_changed
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    forget_tokens((instance.key,))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Смена пароля, is_active и прочих полей сбрасывает кэш токенов.
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    forget_user_tokens((instance.pk,))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingList)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingList)
+@receiver(post_delete, sender=Follow)
+def relation_changed(sender, instance, **kwargs):
+    forget_viewer_states((instance.user_id,))
+
+
+@receiver(relations_changed)
+def relations_bulk_changed(sender, user_ids, **kwargs):
+    forget_viewer_states(user_ids)
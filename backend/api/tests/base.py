@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.authentication import tokens
+from api.caches import recipe_fragments, viewer_states
+from api.indexes import ingredient_index, pantry_index, tag_map
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+
+@override_settings(CACHES={'default': LOCMEM, 'auth': LOCMEM})
+class RecipeDataTestCase(TestCase):
+    """Автор, теги, ингредиенты и рецепты для тестов API."""
+
+    recipes_count = 3
+
+    @classmethod
+    def create_user(cls, name, **fields):
+        return User.objects.create_user(
+            username=name,
+            email=f'{name}@example.com',
+            password='Secret-pass-123',
+            first_name=name,
+            last_name=name,
+            **fields,
+        )
+
+    @classmethod
+    def create_recipe(cls, name, ingredients, tags=()):
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name=name,
+            text='text',
+            cooking_time=10,
+            image='recipe/test.png',
+        )
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.viewer = cls.create_user('viewer')
+        cls.tags = [
+            Tag.objects.create(name=f'tag{number}', slug=f'tag{number}')
+            for number in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient{number}', measurement_unit='g'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = [
+            cls.create_recipe(
+                f'recipe{number}',
+                cls.ingredients[number % 4:number % 4 + 2],
+                cls.tags[number % 2:number % 2 + 1],
+            )
+            for number in range(cls.recipes_count)
+        ]
+
+    def setUp(self):
+        # Кэши и индексы общие для процесса, данные каждого теста свои.
+        recipe_fragments.clear()
+        tokens.clear()
+        viewer_states.clear()
+        caches['auth'].clear()
+        for index in (ingredient_index, pantry_index, tag_map):
+            index.version = None
+            index.checked = 0
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
@@ -0,0 +1,70 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import (
+    forget_user_tokens,
+    shared_cache,
+    shared_key,
+    tokens,
+)
+from api.tests.base import RecipeDataTestCase
+from recipes.models import User
+
+
+class CachedTokenAuthenticationTest(RecipeDataTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.viewer)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    def test_cached_after_first_request(self):
+        self.assertEqual(self.get_me(), 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_me(), 200)
+        # С общим кэшем кэш процесса не используется.
+        self.assertEqual(len(tokens), 0)
+        self.assertIsNotNone(shared_cache().get(shared_key(self.token.key)))
+
+    def test_logout(self):
+        self.assertEqual(self.get_me(), 200)
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_me(), 401)
+
+    def test_set_password(self):
+        self.assertEqual(self.get_me(), 200)
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'Secret-pass-123',
+            'new_password': 'Another-pass-456',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_me(), 401)
+
+    def test_deactivate(self):
+        self.assertEqual(self.get_me(), 200)
+        user = User.objects.get(pk=self.viewer.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.get_me(), 401)
+
+    def test_deactivate_by_update(self):
+        self.assertEqual(self.get_me(), 200)
+        User.objects.filter(pk=self.viewer.pk).update(is_active=False)
+        forget_user_tokens((self.viewer.pk,))
+        self.assertEqual(self.get_me(), 401)
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'MAXSIZE': 100, 'TTL': 60, 'SHARED': ''
+    })
+    def test_process_cache(self):
+        self.assertEqual(self.get_me(), 200)
+        self.assertEqual(len(tokens), 1)
+        self.client.post('/api/auth/token/logout/')
+        self.assertEqual(len(tokens), 0)
+        self.assertEqual(self.get_me(), 401)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Favorite
+
+
+class RecipeBatchTest(RecipeDataTestCase):
+
+    def post(self, data):
+        return self.client_for(self.viewer).post(
+            '/api/recipes/favorite/', data, format='json'
+        )
+
+    def test_duplicate_ids(self):
+        recipe = self.recipes[0]
+        response = self.post({'ids': [recipe.id, recipe.id]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': recipe.id, 'status': 'added'}],
+        )
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_filter(self):
+        response = self.post({'author': self.author.id})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [result['id'] for result in response.json()['results']],
+            sorted(recipe.id for recipe in self.recipes),
+        )
+
+    def test_filter_over_limit(self):
+        with mock.patch(
+            'api.serializers.BATCH_MAX_RECIPES', len(self.recipes) - 1
+        ):
+            response = self.post({'author': self.author.id})
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(Favorite.objects.exists())
+
+
+class UserBatchTest(RecipeDataTestCase):
+
+    def test_duplicate_ids(self):
+        response = self.client_for(self.viewer).post(
+            '/api/users/subscribe/',
+            {'ids': [self.author.id, self.author.id]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.author.id, 'status': 'added'}],
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
@@ -0,0 +1,66 @@
+from api.tests.base import RecipeDataTestCase
+from recipes.cart import find_drift
+from recipes.models import ShoppingCartItem, ShoppingList
+
+
+class ShoppingCartAggregateTest(RecipeDataTestCase):
+
+    def cart(self, user):
+        return dict(ShoppingCartItem.objects.filter(user=user).values_list(
+            'ingredient__name', 'amount'
+        ))
+
+    def assert_in_sync(self):
+        self.assertEqual(find_drift((self.viewer.pk, self.author.pk)), set())
+
+    def test_orm_create_and_delete(self):
+        first, second = self.recipes[:2]
+        entry = ShoppingList.objects.create(user=self.viewer, recipe=first)
+        ShoppingList.objects.create(user=self.viewer, recipe=second)
+        self.assertEqual(
+            self.cart(self.viewer),
+            {'ingredient0': 1, 'ingredient1': 2, 'ingredient2': 1},
+        )
+        self.assert_in_sync()
+        entry.delete()
+        self.assertEqual(
+            self.cart(self.viewer), {'ingredient1': 1, 'ingredient2': 1}
+        )
+        self.assert_in_sync()
+
+    def test_entry_moved(self):
+        entry = ShoppingList.objects.create(
+            user=self.viewer, recipe=self.recipes[0]
+        )
+        entry.user = self.author
+        entry.recipe = self.recipes[1]
+        entry.save()
+        self.assertEqual(self.cart(self.viewer), {})
+        self.assert_in_sync()
+
+    def test_recipe_deleted(self):
+        first, second = self.recipes[:2]
+        for user in (self.viewer, self.author):
+            ShoppingList.objects.create(user=user, recipe=first)
+            ShoppingList.objects.create(user=user, recipe=second)
+        first.delete()
+        self.assertEqual(
+            self.cart(self.viewer), {'ingredient1': 1, 'ingredient2': 1}
+        )
+        self.assert_in_sync()
+
+    def test_api(self):
+        recipe = self.recipes[0]
+        client = self.client_for(self.viewer)
+        client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+        client.post(
+            '/api/recipes/shopping_cart/',
+            {'ids': [recipe.id, self.recipes[1].id]},
+            format='json',
+        )
+        self.assert_in_sync()
+        client.delete(f'/api/recipes/{recipe.id}/shopping_cart/')
+        self.assertEqual(
+            self.cart(self.viewer), {'ingredient1': 1, 'ingredient2': 1}
+        )
+        self.assert_in_sync()
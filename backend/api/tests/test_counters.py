@@ -0,0 +1,59 @@
+import io
+
+from django.core.management import call_command
+
+from api.tests.base import RecipeDataTestCase
+from recipes.counters import change_counter
+from recipes.models import Recipe, User
+
+
+class CounterTest(RecipeDataTestCase):
+
+    def counters(self):
+        recipe = Recipe.objects.get(pk=self.recipes[0].pk)
+        author = User.objects.get(pk=self.author.pk)
+        return (
+            recipe.favorites_count,
+            author.recipes_count,
+            author.followers_count,
+        )
+
+    def test_write_paths(self):
+        client = self.client_for(self.viewer)
+        recipe = self.recipes[0]
+        self.assertEqual(self.counters(), (0, self.recipes_count, 0))
+        client.post(f'/api/recipes/{recipe.pk}/favorite/')
+        client.post(f'/api/users/{self.author.pk}/subscribe/')
+        self.assertEqual(self.counters(), (1, self.recipes_count, 1))
+        # Повтор в пакетной ручке счётчик не меняет.
+        client.post(
+            '/api/recipes/favorite/', {'ids': [recipe.pk]}, format='json'
+        )
+        self.assertEqual(self.counters(), (1, self.recipes_count, 1))
+        client.delete(
+            '/api/recipes/favorite/', {'ids': [recipe.pk]}, format='json'
+        )
+        client.delete(f'/api/users/{self.author.pk}/subscribe/')
+        self.recipes[1].delete()
+        self.assertEqual(self.counters(), (0, self.recipes_count - 1, 0))
+
+    def test_subscriptions_use_counter(self):
+        client = self.client_for(self.viewer)
+        client.post(f'/api/users/{self.author.pk}/subscribe/')
+        User.objects.filter(pk=self.author.pk).update(recipes_count=42)
+        response = client.get('/api/users/subscriptions/')
+        self.assertEqual(response.json()['results'][0]['recipes_count'], 42)
+
+    def test_never_negative(self):
+        change_counter(Recipe, 'favorites_count', (self.recipes[0].pk,), -1)
+        self.assertEqual(self.counters()[0], 0)
+
+    def test_reconcile(self):
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            favorites_count=7
+        )
+        User.objects.filter(pk=self.author.pk).update(
+            recipes_count=0, followers_count=3
+        )
+        call_command('reconcile_counters', stdout=io.StringIO())
+        self.assertEqual(self.counters(), (0, self.recipes_count, 0))
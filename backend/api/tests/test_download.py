@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+
+from api.tests.base import RecipeDataTestCase
+from recipes.constants import SHOPPING_LIST_FORMAT_PARAM
+from recipes.models import ShoppingList
+
+URL = '/api/recipes/download_shopping_cart/'
+ROWS = [
+    ['ingredient0', 'g', '1'],
+    ['ingredient1', 'g', '2'],
+    ['ingredient2', 'g', '1'],
+]
+
+
+class ShoppingListDownloadTest(RecipeDataTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for recipe in self.recipes[:2]:
+            ShoppingList.objects.create(user=self.viewer, recipe=recipe)
+
+    def download(self, file_format=None):
+        response = self.client_for(self.viewer).get(URL, (
+            {SHOPPING_LIST_FORMAT_PARAM: file_format} if file_format else {}
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename="shopping_list.{file_format or "txt"}"',
+        )
+        return b''.join(response.streaming_content)
+
+    def test_txt(self):
+        lines = self.download().decode().splitlines()
+        self.assertEqual(lines, ['Shopping list'] + [
+            f'{name} ({unit}) - {amount}' for name, unit, amount in ROWS
+        ])
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.download('csv').decode())))
+        self.assertEqual(rows, [['name', 'measurement_unit', 'amount']] + ROWS)
+
+    def test_json(self):
+        self.assertEqual(json.loads(self.download('json')), [
+            {'name': name, 'measurement_unit': unit, 'amount': int(amount)}
+            for name, unit, amount in ROWS
+        ])
+
+    def test_empty_json(self):
+        ShoppingList.objects.filter(user=self.viewer).delete()
+        self.assertEqual(json.loads(self.download('json')), [])
+
+    def test_pdf(self):
+        self.assertTrue(self.download('pdf').startswith(b'%PDF'))
+
+    def test_unknown_format(self):
+        response = self.client_for(self.viewer).get(
+            URL, {SHOPPING_LIST_FORMAT_PARAM: 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(SHOPPING_LIST_FORMAT_PARAM, response.json())
@@ -0,0 +1,58 @@
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Favorite, Tag
+
+
+class ConditionalGetTest(RecipeDataTestCase):
+
+    def get(self, url, etag=None, user=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client_for(user).get(url, **headers)
+
+    def assert_revalidated(self, url, user=None):
+        """Возвращает ETag, проверив 304 на совпадающий и 200 на чужой."""
+        first = self.get(url, user=user)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        response = self.get(url, first['ETag'], user)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], first['ETag'])
+        response = self.get(url, '"stale"', user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), first.json())
+        return first['ETag']
+
+    def test_tags(self):
+        etag = self.assert_revalidated('/api/tags/')
+        Tag.objects.create(name='tag new', slug='tag-new')
+        response = self.get('/api/tags/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('tag-new', [tag['slug'] for tag in response.json()])
+
+    def test_recipe_changed(self):
+        recipe = self.recipes[0]
+        url = f'/api/recipes/{recipe.pk}/'
+        etag = self.assert_revalidated(url)
+        response = self.client_for(self.author).patch(
+            url, {'name': 'renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'renamed')
+
+    def test_recipe_viewer_flags(self):
+        recipe = self.recipes[0]
+        url = f'/api/recipes/{recipe.pk}/'
+        etag = self.assert_revalidated(url, self.viewer)
+        Favorite.objects.create(user=self.viewer, recipe=recipe)
+        response = self.get(url, etag, self.viewer)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_favorited'])
+        # Избранное зрителя не меняет ETag для других.
+        self.assert_revalidated(url, self.author)
+
+    def test_missing_recipe(self):
+        response = self.get('/api/recipes/0/', '"recipe-0"')
+        self.assertEqual(response.status_code, 404)
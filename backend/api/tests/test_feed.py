@@ -0,0 +1,40 @@
+from django.test import override_settings
+
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Follow
+
+
+@override_settings(FEED={'FANOUT_MAX_FOLLOWERS': 1, 'BACKFILL_RECIPES': 50})
+class FeedTest(RecipeDataTestCase):
+
+    def feed_names(self):
+        response = self.client_for(self.viewer).get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {recipe['name'] for recipe in response.json()['results']}
+
+    def test_recipes_kept_after_pull_to_push(self):
+        other = self.create_user('other')
+        Follow.objects.create(user=self.viewer, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        # Подписчиков больше порога: рецепт читается из Recipe.
+        self.create_recipe('pulled', self.ingredients[:1])
+        self.assertIn('pulled', self.feed_names())
+        follow.delete()
+        self.assertIn('pulled', self.feed_names())
+
+    def test_batch_unsubscribe_refills(self):
+        others = [self.create_user(f'other{number}') for number in range(2)]
+        Follow.objects.create(user=self.viewer, author=self.author)
+        for other in others:
+            Follow.objects.create(user=other, author=self.author)
+        self.create_recipe('pulled', self.ingredients[:1])
+        response = self.client_for(others[0]).delete(
+            '/api/users/subscribe/', {'ids': [self.author.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('pulled', self.feed_names())
+        response = self.client_for(others[1]).delete(
+            '/api/users/subscribe/', {'ids': [self.author.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('pulled', self.feed_names())
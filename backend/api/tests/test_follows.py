@@ -0,0 +1,92 @@
+import io
+import tempfile
+
+from django.core.management import call_command
+
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Follow, User
+
+URL = '/api/users/subscribe/'
+
+
+class BulkFollowTest(RecipeDataTestCase):
+
+    def change(self, method, ids):
+        response = getattr(self.client_for(self.viewer), method)(
+            URL, {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return {
+            result['id']: result['status']
+            for result in response.json()['results']
+        }
+
+    def followers_count(self, user):
+        return User.objects.get(pk=user.pk).followers_count
+
+    def test_subscribe_and_unsubscribe(self):
+        other = self.create_user('other')
+        Follow.objects.create(user=self.viewer, author=other)
+        missing = User.objects.order_by('-pk')[0].pk + 1
+        self.assertEqual(
+            self.change('post', [
+                self.author.pk, self.author.pk, other.pk,
+                self.viewer.pk, missing,
+            ]),
+            {
+                self.author.pk: 'added',
+                other.pk: 'exists',
+                self.viewer.pk: 'self',
+                missing: 'not_found',
+            },
+        )
+        self.assertEqual(self.followers_count(self.author), 1)
+        self.assertFalse(
+            Follow.objects.filter(user=self.viewer, author=self.viewer)
+        )
+        self.assertEqual(
+            self.change('delete', [self.author.pk, self.viewer.pk]),
+            {self.author.pk: 'removed', self.viewer.pk: 'absent'},
+        )
+        self.assertEqual(self.followers_count(self.author), 0)
+
+    def test_single_subscribe_validated_first(self):
+        client = self.client_for(self.viewer)
+        response = client.post(f'/api/users/{self.viewer.pk}/subscribe/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.exists())
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(client.post(url).status_code, 201)
+        self.assertEqual(client.post(url).status_code, 400)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.followers_count(self.author), 1)
+
+    def test_import_follows(self):
+        other = self.create_user('other')
+        Follow.objects.create(user=other, author=self.author)
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', encoding='utf-8'
+        ) as file:
+            file.write(
+                'follower,author\n'
+                'viewer,author\n'
+                'viewer,author\n'
+                'viewer,other\n'
+                'viewer,viewer\n'
+                'viewer,nobody\n'
+                'other,author\n'
+            )
+            file.flush()
+            output = io.StringIO()
+            call_command(
+                'import_follows', file.name, chunk_size=2, stdout=output
+            )
+        self.assertIn('Добавлено подписок: 2, пропущено: 4', output.getvalue())
+        self.assertEqual(
+            set(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            {('viewer', 'author'), ('viewer', 'other'), ('other', 'author')},
+        )
+        self.assertEqual(self.followers_count(self.author), 2)
+        self.assertEqual(self.followers_count(other), 1)
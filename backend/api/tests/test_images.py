@@ -0,0 +1,85 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from api.tests.base import RecipeDataTestCase
+from jobs.models import Job
+from recipes.constants import IMAGE_VARIANT_SIZES
+from recipes.models import Recipe
+from recipes.tasks import generate_image_variants
+
+
+def encode(image_format, size=(8, 8), **params):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format, **params)
+    return 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RecipeImageTest(RecipeDataTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'])
+        super().tearDownClass()
+
+    def create(self, image):
+        return self.client_for(self.author).post('/api/recipes/', {
+            'name': 'photo',
+            'text': 'text',
+            'cooking_time': 5,
+            'image': image,
+            'tags': [self.tags[0].id],
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+        }, format='json')
+
+    def test_mpo_accepted_as_jpeg(self):
+        response = self.create(encode(
+            'MPO', save_all=True,
+            append_images=[Image.new('RGB', (8, 8), 'blue')],
+        ))
+        self.assertEqual(response.status_code, 201, response.content)
+        image = Recipe.objects.get(name='photo').image
+        self.assertTrue(image.name.endswith('.jpg'))
+
+    def test_unsupported_format(self):
+        response = self.create(encode('BMP'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
+
+    def test_variants(self):
+        response = self.create(encode('PNG', size=(1600, 800)))
+        self.assertEqual(response.status_code, 201, response.content)
+        recipe = Recipe.objects.get(name='photo')
+        job = Job.objects.get(name='recipes.generate_image_variants')
+        self.assertEqual(
+            job.payload, {'recipe_id': recipe.pk, 'image': recipe.image.name}
+        )
+        variants = generate_image_variants(**job.payload)
+        self.assertEqual(set(variants), set(IMAGE_VARIANT_SIZES))
+        for variant, size in IMAGE_VARIANT_SIZES.items():
+            for fmt, path in variants[variant].items():
+                with default_storage.open(path) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.format.lower(), fmt)
+                    self.assertEqual(image.size, (size, size // 2))
+        data = self.client_for().get(f'/api/recipes/{recipe.pk}/').json()
+        self.assertEqual(
+            data['image_variants']['thumbnail']['webp'],
+            'http://testserver/media/' + variants['thumbnail']['webp'],
+        )
+
+    def test_variants_of_replaced_image(self):
+        response = self.create(encode('PNG'))
+        self.assertEqual(response.status_code, 201, response.content)
+        recipe = Recipe.objects.get(name='photo')
+        self.assertIsNone(generate_image_variants(recipe.pk, 'recipe/old.png'))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {})
@@ -0,0 +1,72 @@
+import base64
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Recipe
+from recipes.transfer import ERROR_SAMPLE_SIZE, RecipeImporter
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RecipeImporterTest(RecipeDataTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'])
+        super().tearDownClass()
+
+    def line(self, name, image='recipe/test.png', author='author'):
+        return json.dumps({
+            'name': name,
+            'text': 'text',
+            'cooking_time': 5,
+            'author': author,
+            'tags': [self.tags[0].slug],
+            'ingredients': [{
+                'name': self.ingredients[0].name,
+                'measurement_unit': 'g',
+                'amount': 1,
+            }],
+            'image': image,
+        })
+
+    def test_errors_reported_and_sample_capped(self):
+        reported = []
+        importer = RecipeImporter(10, report=reported.append)
+        lines = [
+            self.line(f'bad{number}', author='nobody')
+            for number in range(ERROR_SAMPLE_SIZE + 5)
+        ]
+        list(importer.run(io.StringIO('\n'.join(lines))))
+        self.assertEqual(importer.error_count, ERROR_SAMPLE_SIZE + 5)
+        self.assertEqual(len(reported), ERROR_SAMPLE_SIZE + 5)
+        self.assertEqual(importer.error_sample, reported[:ERROR_SAMPLE_SIZE])
+        self.assertEqual(importer.imported, 0)
+
+    def test_rolled_back_batch_drops_new_images(self):
+        existing = default_storage.save(
+            'recipe/existing.png', io.BytesIO(b'png')
+        )
+        data = base64.b64encode(b'png').decode()
+        lines = [
+            self.line('new', {'name': 'recipe/new.png', 'data': data}),
+            self.line('existing', existing),
+        ]
+        importer = RecipeImporter(10)
+        with mock.patch.object(
+            RecipeImporter, 'save_recipes', side_effect=RuntimeError
+        ), mock.patch.object(
+            default_storage, 'delete', wraps=default_storage.delete
+        ) as delete:
+            with self.assertRaises(RuntimeError):
+                list(importer.run(io.StringIO('\n'.join(lines))))
+        self.assertEqual(delete.call_count, 1)
+        self.assertFalse(default_storage.exists(delete.call_args[0][0]))
+        self.assertTrue(default_storage.exists(existing))
+        self.assertFalse(Recipe.objects.filter(name='new').exists())
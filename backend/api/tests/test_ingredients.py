@@ -0,0 +1,35 @@
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Ingredient
+
+
+class IngredientSearchTest(RecipeDataTestCase):
+
+    def search(self, headers=None, **params):
+        return self.client_for().get(
+            '/api/ingredients/', {'name': 'ingredient', **params},
+            **(headers or {})
+        )
+
+    def test_limit(self):
+        response = self.search(limit=2)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_invalid_limit(self):
+        for limit in ('0', '-1', 'abc'):
+            with self.subTest(limit=limit):
+                response = self.search(limit=limit)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('limit', response.json())
+
+    def test_etag_matches_body(self):
+        first = self.search()
+        self.assertEqual(first.status_code, 200)
+        Ingredient.objects.create(name='ingredient new', measurement_unit='g')
+        # Индекс проверен только что, но ETag уже новый.
+        response = self.search({'HTTP_IF_NONE_MATCH': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertIn(
+            'ingredient new', [row['name'] for row in response.json()]
+        )
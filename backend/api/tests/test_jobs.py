@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from api.tests.base import RecipeDataTestCase
+from jobs.models import Job
+from jobs.tasks import enqueue, task
+from jobs.worker import claim, renew_lease, requeue_stale, run_job
+
+
+@task('test_fail')
+def fail():
+    raise FileNotFoundError('/srv/secret/path')
+
+
+@task('test_sleep')
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+JOBS = {
+    'ALWAYS_EAGER': False,
+    'MAX_ATTEMPTS': 5,
+    'POLL_INTERVAL': 1,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    'STALE_TIMEOUT': 600,
+}
+
+
+@override_settings(JOBS=JOBS)
+class JobTest(RecipeDataTestCase):
+
+    def test_error_hides_traceback(self):
+        job = enqueue('test_fail', user=self.viewer)
+        run_job(claim('worker'), 'worker')
+        job.refresh_from_db()
+        self.assertIn('/srv/secret/path', job.traceback)
+        response = self.client_for(self.viewer).get('/api/jobs/')
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['results'][0]
+        self.assertEqual(result['error'], 'FileNotFoundError')
+        self.assertNotIn('traceback', result)
+
+    def test_expired_lease_requeued(self):
+        job = enqueue('test_fail')
+        self.assertEqual(claim('first'), job.pk)
+        self.assertEqual(requeue_stale(), 0)
+        Job.objects.filter(pk=job.pk).update(
+            lease_expires=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(claim('second'), job.pk)
+        # Итог первого обработчика не затирает задачу второго.
+        run_job(job.pk, 'first')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.worker, 'second')
+
+    def test_lease_renewed(self):
+        job = enqueue('test_fail')
+        claim('first')
+        Job.objects.filter(pk=job.pk).update(
+            lease_expires=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(renew_lease(job.pk, 'second'), 0)
+        self.assertEqual(renew_lease(job.pk, 'first'), 1)
+        self.assertEqual(requeue_stale(), 0)
+
+    def test_heartbeat_while_running(self):
+        job = enqueue('test_sleep', {'seconds': 0.2})
+        claim('worker')
+        with override_settings(JOBS={**JOBS, 'STALE_TIMEOUT': 0.03}), \
+                mock.patch('jobs.worker.renew_lease') as renew:
+            run_job(job.pk, 'worker')
+        self.assertGreater(renew.call_count, 1)
+        renew.assert_called_with(job.pk, 'worker')
@@ -0,0 +1,45 @@
+from django.test import override_settings
+
+from api.tests.base import RecipeDataTestCase
+from recipes.constants import PAGE_SIZE_MAX
+from recipes.models import Follow, Recipe, User
+
+
+class PageSizeLimitTest(RecipeDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.author,
+                name=f'bulk{number}',
+                text='text',
+                cooking_time=10,
+                image='recipe/test.png',
+            )
+            for number in range(PAGE_SIZE_MAX)
+        )
+
+    def assert_capped(self, url, params):
+        response = self.client_for(self.viewer).get(
+            url, {**params, 'limit': 100000}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()['results']), PAGE_SIZE_MAX)
+        self.assertTrue(response.json()['next'])
+
+    def test_recipe_cursor(self):
+        self.assert_capped('/api/recipes/', {'pagination': 'cursor'})
+
+    @override_settings(FEED={'FANOUT_MAX_FOLLOWERS': 0, 'BACKFILL_RECIPES': 0})
+    def test_feed(self):
+        Follow.objects.create(user=self.viewer, author=self.author)
+        self.assert_capped('/api/recipes/feed/', {})
+
+    def test_user_cursor(self):
+        User.objects.bulk_create(
+            User(username=f'bulk{number}', email=f'bulk{number}@localhost')
+            for number in range(PAGE_SIZE_MAX)
+        )
+        self.assert_capped('/api/users/', {'pagination': 'cursor'})
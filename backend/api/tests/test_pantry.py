@@ -0,0 +1,43 @@
+from api.tests.base import RecipeDataTestCase
+
+
+class PantryTest(RecipeDataTestCase):
+
+    def get_missing(self, ingredients, **params):
+        response = self.client_for().get('/api/recipes/pantry/', {
+            'ingredients': ','.join(
+                str(ingredient.id) for ingredient in ingredients
+            ),
+            **params,
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        return {
+            recipe['name']: recipe['missing']
+            for recipe in response.json()['results']
+        }
+
+    def test_ranked_by_missing(self):
+        first, second, third, _ = self.ingredients
+        self.assertEqual(
+            self.get_missing((first, second)),
+            {'recipe0': 0, 'recipe1': 1},
+        )
+        self.assertEqual(
+            self.get_missing((second, third), max_missing=0),
+            {'recipe1': 0},
+        )
+
+    def test_duplicate_ingredients(self):
+        self.create_recipe('full', self.ingredients)
+        first, second, third, _ = self.ingredients
+        pantry = (first, second, third)
+        expected = self.get_missing(pantry)
+        self.assertEqual(
+            expected,
+            {'recipe0': 0, 'recipe1': 0, 'recipe2': 1, 'full': 1},
+        )
+        self.assertEqual(self.get_missing(pantry * 3), expected)
+        self.assertEqual(
+            self.get_missing((first, first, first)),
+            {'recipe0': 1, 'full': 3},
+        )
@@ -0,0 +1,81 @@
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Favorite, Follow, ShoppingList
+
+# Страница списка: COUNT, рецепты с флагами и автором, теги, ингредиенты.
+LIST_QUERIES = 4
+# Детальный рецепт: ETag, рецепт с флагами и автором, теги, ингредиенты.
+DETAIL_QUERIES = 4
+# Первый запрос зрителя загружает избранное, корзину и подписки.
+VIEWER_STATE_QUERIES = 3
+
+
+class RecipeQueryCountTest(RecipeDataTestCase):
+    # Вторая страница из одного рецепта, первая - из PAGE_SIZE.
+    recipes_count = 7
+
+    @staticmethod
+    def state_queries(user):
+        return 0 if user is None else VIEWER_STATE_QUERIES
+
+    def assert_list_queries(self, user):
+        client = self.client_for(user)
+        with self.assertNumQueries(LIST_QUERIES + self.state_queries(user)):
+            last = client.get('/api/recipes/', {'page': 2})
+        # Первая страница без фрагментов в кэше, затем с ними.
+        with self.assertNumQueries(LIST_QUERIES):
+            cold = client.get('/api/recipes/')
+        with self.assertNumQueries(LIST_QUERIES):
+            response = client.get('/api/recipes/')
+        self.assertEqual(len(last.json()['results']), 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cold.json(), response.json())
+        return response.json()['results']
+
+    def assert_detail_queries(self, user):
+        client = self.client_for(user)
+        url = f'/api/recipes/{self.recipes[0].id}/'
+        with self.assertNumQueries(
+            DETAIL_QUERIES + self.state_queries(user)
+        ):
+            cold = client.get(url)
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cold.json(), response.json())
+        return response.json()
+
+    def test_list_anonymous(self):
+        results = self.assert_list_queries(None)
+        self.assertTrue(results)
+        for recipe in results:
+            self.assertFalse(recipe['is_favorited'])
+            self.assertFalse(recipe['is_in_shopping_cart'])
+            self.assertFalse(recipe['author']['is_subscribed'])
+
+    def test_list_authenticated(self):
+        Favorite.objects.create(user=self.viewer, recipe=self.recipes[-1])
+        ShoppingList.objects.create(
+            user=self.viewer, recipe=self.recipes[-2]
+        )
+        Follow.objects.create(user=self.viewer, author=self.author)
+        results = {
+            recipe['id']: recipe
+            for recipe in self.assert_list_queries(self.viewer)
+        }
+        self.assertTrue(results[self.recipes[-1].id]['is_favorited'])
+        self.assertFalse(results[self.recipes[-2].id]['is_favorited'])
+        self.assertTrue(
+            results[self.recipes[-2].id]['is_in_shopping_cart']
+        )
+        self.assertTrue(all(
+            recipe['author']['is_subscribed'] for recipe in results.values()
+        ))
+
+    def test_detail_anonymous(self):
+        self.assertFalse(self.assert_detail_queries(None)['is_favorited'])
+
+    def test_detail_authenticated(self):
+        Favorite.objects.create(user=self.viewer, recipe=self.recipes[0])
+        recipe = self.assert_detail_queries(self.viewer)
+        self.assertTrue(recipe['is_favorited'])
+        self.assertFalse(recipe['author']['is_subscribed'])
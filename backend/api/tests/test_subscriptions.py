@@ -0,0 +1,59 @@
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Follow, Recipe
+
+URL = '/api/users/subscriptions/'
+
+
+class SubscriptionsPageTest(RecipeDataTestCase):
+
+    def follow_authors(self, count):
+        start = Follow.objects.count()
+        for number in range(start, start + count):
+            author = self.create_user(f'followed{number}')
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=author,
+                    name=f'{author.username} recipe{index}',
+                    text='text',
+                    cooking_time=10,
+                    image='recipe/test.png',
+                )
+                for index in range(3)
+            )
+            Follow.objects.create(user=self.viewer, author=author)
+
+    def get(self, **params):
+        response = self.client_for(self.viewer).get(URL, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results']
+
+    def test_recipes_limit(self):
+        Follow.objects.create(user=self.viewer, author=self.author)
+        newest = Recipe.objects.filter(author=self.author).order_by(
+            '-pub_date', 'id'
+        ).values_list('id', flat=True)
+        (row,) = self.get(recipes_limit=2)
+        self.assertTrue(row['is_subscribed'])
+        self.assertEqual(row['recipes_count'], self.recipes_count)
+        self.assertEqual(
+            [recipe['id'] for recipe in row['recipes']], list(newest[:2])
+        )
+        (row,) = self.get()
+        self.assertEqual(len(row['recipes']), self.recipes_count)
+
+    def test_queries_independent_of_page(self):
+        self.follow_authors(1)
+        with self.assertNumQueries(3):
+            self.get(recipes_limit=2)
+        self.follow_authors(4)
+        with self.assertNumQueries(3):
+            rows = self.get(recipes_limit=2)
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(len(row['recipes']) == 2 for row in rows))
+
+    def test_invalid_limit(self):
+        response = self.client_for(self.viewer).get(
+            URL, {'recipes_limit': '-1'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('recipes_limit', response.json())
@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.indexes import tag_map
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Tag
+
+
+class TagFilterTest(RecipeDataTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.both = cls.create_recipe('both', cls.ingredients[:1], cls.tags)
+
+    def ids(self, **params):
+        response = self.client_for().get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def tagged(self, *tags):
+        return sorted(
+            recipe.pk for recipe in (*self.recipes, self.both)
+            if set(tags) <= set(recipe.tags.all())
+        )
+
+    def test_any(self):
+        first, second = self.tags
+        everything = sorted({*self.tagged(first), *self.tagged(second)})
+        for params in (
+            {'tags': [first.slug, second.slug]},
+            {'tags': f'{first.slug},{second.slug}'},
+            {'tags': [first.slug, second.slug], 'tags_mode': 'any'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(sorted(self.ids(**params)), everything)
+        self.assertEqual(
+            sorted(self.ids(tags=[first.slug, 'unknown'])),
+            self.tagged(first),
+        )
+
+    def test_all(self):
+        first, second = self.tags
+        self.assertEqual(
+            self.ids(tags=[first.slug, second.slug], tags_mode='all'),
+            [self.both.pk],
+        )
+        self.assertEqual(
+            self.ids(tags=[first.slug, 'unknown'], tags_mode='all'), []
+        )
+
+    def test_unknown_only(self):
+        self.assertEqual(self.ids(tags='unknown'), [])
+
+    def test_invalid_mode(self):
+        response = self.client_for().get(
+            '/api/recipes/', {'tags': self.tags[0].slug, 'tags_mode': 'x'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_slugs_cached(self):
+        slug = self.tags[0].slug
+        self.ids(tags=slug)
+        with CaptureQueriesContext(connection) as queries:
+            self.ids(tags=slug)
+        for query in queries:
+            self.assertNotIn('DISTINCT', query['sql'])
+            self.assertNotIn('"recipes_tag"."slug" IN', query['sql'])
+            self.assertNotIn('"recipes_tag"."slug" =', query['sql'])
+
+    def test_new_tag_after_version_change(self):
+        self.ids(tags='fresh')
+        tag = Tag.objects.create(name='fresh', slug='fresh')
+        self.both.tags.add(tag)
+        # Интервал проверки версии истёк.
+        tag_map.checked = 0
+        self.assertEqual(self.ids(tags='fresh'), [self.both.pk])
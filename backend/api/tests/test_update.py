@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Recipe, RecipeIngredient, ShoppingCartItem
+
+RecipeTag = Recipe.tags.through
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class RecipeUpdateTest(RecipeDataTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def patch(self, **data):
+        response = self.client_for(self.author).patch(
+            self.url, data, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def rows(self):
+        return dict(RecipeIngredient.objects.filter(
+            recipe=self.recipe
+        ).values_list('ingredient_id', 'pk'))
+
+    def tag_rows(self):
+        return set(RecipeTag.objects.filter(
+            recipe=self.recipe
+        ).values_list('pk', flat=True))
+
+    def test_one_field_writes_one_row(self):
+        rows, tag_rows = self.rows(), self.tag_rows()
+        with CaptureQueriesContext(connection) as queries:
+            self.patch(
+                cooking_time=20,
+                tags=[tag.pk for tag in self.recipe.tags.all()],
+                ingredients=[
+                    {'id': ingredient_id, 'amount': 1}
+                    for ingredient_id in rows
+                ],
+            )
+        writes = [
+            query['sql'] for query in queries
+            if query['sql'].startswith(WRITES)
+        ]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertIn('"recipes_recipe"', writes[0])
+        self.assertEqual(self.rows(), rows)
+        self.assertEqual(self.tag_rows(), tag_rows)
+
+    def test_ingredient_diff(self):
+        first, second, third = self.ingredients[:3]
+        self.client_for(self.viewer).post(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+        kept = self.rows()[second.pk]
+        data = self.patch(ingredients=[
+            {'id': second.pk, 'amount': 5},
+            {'id': third.pk, 'amount': 2},
+        ])
+        self.assertEqual(
+            {row['id']: row['amount'] for row in data['ingredients']},
+            {second.pk: 5, third.pk: 2},
+        )
+        rows = self.rows()
+        self.assertEqual(set(rows), {second.pk, third.pk})
+        self.assertEqual(rows[second.pk], kept)
+        self.assertEqual(
+            dict(ShoppingCartItem.objects.filter(
+                user=self.viewer
+            ).values_list('ingredient_id', 'amount')),
+            {second.pk: 5, third.pk: 2},
+        )
+        self.assertNotIn(first.pk, rows)
+
+    def test_tag_diff(self):
+        kept, added = self.tags
+        self.recipe.tags.set((kept,))
+        tag_rows = self.tag_rows()
+        data = self.patch(tags=[kept.pk, added.pk])
+        self.assertEqual(
+            {tag['id'] for tag in data['tags']}, {kept.pk, added.pk}
+        )
+        self.assertLess(tag_rows, self.tag_rows())
+        data = self.patch(tags=[added.pk])
+        self.assertEqual([tag['id'] for tag in data['tags']], [added.pk])
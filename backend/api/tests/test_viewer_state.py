@@ -0,0 +1,56 @@
+from django.core.cache import caches
+
+from api.caches import viewer_version_key
+from api.tests.base import RecipeDataTestCase
+from recipes.models import Favorite, Follow, ShoppingList
+
+
+class ViewerStateTest(RecipeDataTestCase):
+
+    def get_recipe(self, recipe):
+        response = self.client_for(self.viewer).get(
+            f'/api/recipes/{recipe.id}/'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_api_writes(self):
+        recipe = self.recipes[0]
+        self.assertFalse(self.get_recipe(recipe)['is_favorited'])
+        client = self.client_for(self.viewer)
+        client.post(f'/api/recipes/{recipe.id}/favorite/')
+        client.post(
+            '/api/recipes/shopping_cart/', {'ids': [recipe.id]},
+            format='json',
+        )
+        client.post(
+            '/api/users/subscribe/', {'ids': [self.author.id]},
+            format='json',
+        )
+        data = self.get_recipe(recipe)
+        self.assertTrue(data['is_favorited'])
+        self.assertTrue(data['is_in_shopping_cart'])
+        self.assertTrue(data['author']['is_subscribed'])
+        client.delete(f'/api/recipes/{recipe.id}/favorite/')
+        self.assertFalse(self.get_recipe(recipe)['is_favorited'])
+
+    def test_orm_writes(self):
+        recipe = self.recipes[0]
+        self.assertFalse(self.get_recipe(recipe)['is_in_shopping_cart'])
+        ShoppingList.objects.create(user=self.viewer, recipe=recipe)
+        Follow.objects.create(user=self.viewer, author=self.author)
+        data = self.get_recipe(recipe)
+        self.assertTrue(data['is_in_shopping_cart'])
+        self.assertTrue(data['author']['is_subscribed'])
+
+    def test_version_changed_by_other_worker(self):
+        recipe = self.recipes[0]
+        self.assertFalse(self.get_recipe(recipe)['is_favorited'])
+        # bulk_create сигналов не шлёт: состояние процесса устарело.
+        Favorite.objects.bulk_create(
+            [Favorite(user=self.viewer, recipe=recipe)]
+        )
+        self.assertFalse(self.get_recipe(recipe)['is_favorited'])
+        # Другой воркер записал и сменил версию в общем кэше.
+        caches['auth'].set(viewer_version_key(self.viewer.pk), 'other')
+        self.assertTrue(self.get_recipe(recipe)['is_favorited'])
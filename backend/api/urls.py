@@ -4,6 +4,7 @@ from rest_framework import routers
 from api.views import (
     IngredientViewSet,
     CustomUserViewSet,
+    JobViewSet,
     RecipeViewSet,
     TagViewSet
 )
@@ -16,6 +17,7 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('users', CustomUserViewSet, basename='users')
 router.register('tags', TagViewSet, basename='tag')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
+router.register('jobs', JobViewSet, basename='jobs')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,30 +1,71 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from django.db.models import Sum
+from django.utils.decorators import method_decorator
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Value,
+    Window,
+)
+from django.db.models.functions import RowNumber
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import serializers, viewsets, status, pagination
+from django_filters.constants import EMPTY_VALUES
+from django_filters.utils import translate_validation
+from rest_framework import serializers, viewsets, status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
+    IsAuthenticated,
     AllowAny
 )
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from djoser.views import UserViewSet
 
-from api.filters import IngredientFilter, RecipeFilter
+from api.caches import forget_viewer_states, viewer_versions
+from api.etags import (
+    ingredient_conditional,
+    recipe_conditional,
+    table_validators,
+    tag_conditional,
+)
+from api.exports import shopping_list_response
+from api.filters import IngredientFilter, RecipeFilter, UserFilter, tag_ids
+from api.indexes import ingredient_index, pantry_index
+from api.pagination import FeedPagination, RecipePagination, UserPagination
 from api.permissions import IsAuthorOrReadOnly
 from api.serializers import (
     FollowValidateSerializer,
+    RecipeBatchSerializer,
+    PantrySerializer,
+    UserBatchSerializer,
     RecipeCreateSerializers,
     RecipeShortSerializer,
     IngredientSerializer,
     FollowSerializer,
+    JobSerializer,
     RecipeSerializer,
     UserSerializer,
     TagSerializer,
 )
+from jobs.models import Job
+from recipes.bulk import (
+    follow_authors,
+    link_recipes,
+    unfollow_authors,
+    unlink_recipes,
+)
+from recipes.cart import add_recipes, remove_recipes
+from recipes.counters import change_counter
+from recipes.feed import backfill, drop_authors, feed_keys, refill_crossed
+from recipes.similar import similar_recipes
 from recipes.models import (
+    ShoppingCartItem,
     RecipeIngredient,
     ShoppingList,
     Ingredient,
@@ -34,8 +75,12 @@ from recipes.models import (
     Tag,
 )
 from recipes.constants import (
-    FILE_SHOPPING_LIST,
-    CONTENT,
+    SHOPPING_LIST_FORMAT_PARAM,
+    SHOPPING_LIST_FORMATS,
+    SIMILAR_RECIPES_LIMIT,
+    SIMILAR_RECIPES_MAX,
+    TAGS_MODE_ALL,
+    TAGS_MODE_ANY,
 )
 
 
@@ -46,6 +91,28 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AllowAny, )
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserFilter
+    pagination_class = UserPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            ).order_by('username', 'id')
+        return queryset.annotate(is_subscribed=Exists(Follow.objects.filter(
+            user_id=user.pk, author_id=OuterRef('pk')
+        ))).order_by('username', 'id')
+
+    def get_instance(self):
+        user = super().get_instance()
+        # На себя подписаться нельзя.
+        user.is_subscribed = False
+        return user
 
     @action(
         detail=True,
@@ -53,12 +120,9 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticatedOrReadOnly,)
     )
     def subscribe(self, request, id=None):
-        user = request.user
-        author = get_object_or_404(User, id=id)
+        get_object_or_404(User, id=id)
         data = {'user': request.user.id, 'author': id}
-        follow = Follow.objects.create(user=user, author=author)
         serializer = FollowValidateSerializer(
-            follow,
             data=data,
             context={'request': request}
         )
@@ -69,44 +133,163 @@ class CustomUserViewSet(UserViewSet):
 
     @subscribe.mapping.delete
     def unsubscribe(self, request, id):
-        follow = Follow.objects.filter(
-            user=request.user,
-            author=get_object_or_404(User, id=id),
-        )
+        author = get_object_or_404(User, id=id)
+        follow = Follow.objects.filter(user=request.user, author=author)
         if not follow.exists():
             raise serializers.ValidationError('There is no such subscription')
         follow.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        url_path='subscribe',
+        url_name='subscribe-batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    @transaction.atomic
+    def subscribe_batch(self, request):
+        serializer = UserBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        authors = User.objects.filter(id__in=ids)
+        found = set(authors.values_list('id', flat=True))
+        added = request.method == 'POST'
+        if added:
+            changed = follow_authors(user.pk, authors)
+        else:
+            changed = unfollow_authors(user.pk, authors)
+        if changed:
+            change_counter(
+                User, 'followers_count', changed, 1 if added else -1
+            )
+            forget_viewer_states((user.pk,))
+        if changed and added:
+            backfill(Follow.objects.filter(user=user, author_id__in=changed))
+        elif changed:
+            drop_authors(user.pk, changed)
+            refill_crossed(changed)
+        changed = set(changed)
+        statuses = ('added', 'exists') if added else ('removed', 'absent')
+        results = []
+        for author_id in ids:
+            if author_id not in found:
+                result = 'not_found'
+            elif added and author_id == user.pk:
+                result = 'self'
+            else:
+                result = statuses[author_id not in changed]
+            results.append({'id': author_id, 'status': result})
+        return Response({'results': results})
+
     @action(
         detail=False,
         permission_classes=(IsAuthenticatedOrReadOnly, ),
-        serializer_class=(FollowSerializer, )
+        serializer_class=(FollowSerializer, ),
+        pagination_class=PageNumberPagination,
     )
     def subscriptions(self, request):
-        queryset = request.user.followers.all()
+        limit = request.query_params.get('recipes_limit')
+        if limit is not None and not limit.isdigit():
+            raise serializers.ValidationError(
+                {'recipes_limit': 'Limit must be a positive integer'}
+            )
+        # Подписки пользователя: is_subscribed у всех истинно.
+        queryset = request.user.followers.select_related('author').annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        )
         pages = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
             pages,
             many=True,
-            context={'request': request}
+            context={
+                'request': request,
+                'recipes': self.__latest_recipes(
+                    [follow.author_id for follow in pages],
+                    int(limit) if limit else None,
+                ),
+            }
         )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def __latest_recipes(author_ids, limit):
+        recipes = Recipe.objects.filter(author_id__in=author_ids).only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id'
+        )
+        if limit is not None:
+            ranked = recipes.annotate(recipe_rank=Window(
+                RowNumber(),
+                partition_by=(F('author_id'),),
+                order_by=(F('pub_date').desc(), F('id').asc()),
+            )).values('id', 'name', 'image', 'image_variants',
+                      'cooking_time', 'author_id', 'recipe_rank')
+            sql, params = ranked.query.sql_with_params()
+            recipes = Recipe.objects.raw(
+                f'SELECT * FROM ({sql}) ranked '
+                f'WHERE ranked.recipe_rank <= %s '
+                f'ORDER BY ranked.author_id, ranked.recipe_rank',
+                (*params, limit),
+            )
+        by_author = {}
+        for recipe in recipes:
+            by_author.setdefault(recipe.author_id, []).append(recipe)
+        return by_author
+
 
+@method_decorator(recipe_conditional, name='retrieve')
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = RecipePagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('retrieve', 'list', 'feed', 'pantry'):
+            return queryset
+        user = self.request.user
+        queryset = queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_recipes',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+        if user.is_anonymous:
+            is_favorited = is_in_shopping_cart = author_subscribed = Value(
+                False, output_field=BooleanField()
+            )
+        elif viewer_versions() is not None:
+            # Флаги берутся из кэша состояния зрителя.
+            return queryset
+        else:
+            is_favorited = Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+            is_in_shopping_cart = Exists(ShoppingList.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+            author_subscribed = Exists(Follow.objects.filter(
+                user=user, author=OuterRef('author_id')
+            ))
+        return queryset.annotate(
+            is_favorited=is_favorited,
+            is_in_shopping_cart=is_in_shopping_cart,
+            author_subscribed=author_subscribed,
+        )
 
     def get_serializer_class(self):
-        if self.action in ('retrive', 'list'):
+        if self.action in ('retrieve', 'list', 'feed', 'pantry'):
             return RecipeSerializer
         return RecipeCreateSerializers
 
     @staticmethod
+    @transaction.atomic
     def __add_to(model, user, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         model.objects.create(user=user, recipe=recipe)
@@ -114,20 +297,45 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @staticmethod
+    @transaction.atomic
     def __delete_from(model, user, pk):
         model.objects.filter(user=user, recipe__id=pk).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @staticmethod
-    def __create_txt_cart(ingredients):
-        shopping_list = 'Shopping list'
-        for ingredient in ingredients:
-            shopping_list += (
-                f"\n{ingredient['ingredient__name']} "
-                f"({ingredient['ingredient__measurement_unit']}) - "
-                f"{ingredient['amount']}"
+    @transaction.atomic
+    def __change_batch(model, request):
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.get_recipes()
+        user = request.user
+        matched = set(recipes.values_list('id', flat=True))
+        added = request.method == 'POST'
+        if added:
+            changed = link_recipes(model, user.pk, recipes)
+        else:
+            changed = unlink_recipes(model, user.pk, recipes)
+        if changed and model is Favorite:
+            change_counter(
+                Recipe, 'favorites_count', changed, 1 if added else -1
             )
-        return shopping_list
+        if changed and model is ShoppingList:
+            # Массовые вставка и удаление сигналов не шлют.
+            (add_recipes if added else remove_recipes)(user.pk, changed)
+        if changed:
+            forget_viewer_states((user.pk,))
+        changed = set(changed)
+        statuses = ('added', 'exists') if added else ('removed', 'absent')
+        return Response({'results': [
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in matched
+                    else statuses[recipe_id not in changed]
+                ),
+            }
+            for recipe_id in serializer.validated_data['ids']
+        ]})
 
     @action(detail=True, methods=['post', 'delete'])
     def favorite(self, request, pk):
@@ -141,21 +349,136 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.__add_to(ShoppingList, request.user, pk)
         return self.__delete_from(ShoppingList, request.user, pk)
 
-    @action(detail=False, methods=('GET', ))
+    @action(
+        detail=True,
+        methods=('GET', ),
+        permission_classes=(AllowAny,)
+    )
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe, id=pk)
+        limit = request.query_params.get('limit', str(SIMILAR_RECIPES_LIMIT))
+        if not limit.isdigit() or not 0 < int(limit) <= SIMILAR_RECIPES_MAX:
+            raise serializers.ValidationError({
+                'limit': f'Limit must be from 1 to {SIMILAR_RECIPES_MAX}'
+            })
+        similarity = dict(similar_recipes(recipe.id, int(limit)))
+        recipes = Recipe.objects.in_bulk(similarity)
+        data = RecipeShortSerializer(
+            [recipes[pk] for pk in similarity if pk in recipes],
+            many=True,
+            context={'request': request},
+        ).data
+        for item in data:
+            item['similarity'] = round(similarity[item['id']], 3)
+        return Response(data)
+
+    @action(
+        detail=False,
+        methods=('GET', ),
+        permission_classes=(AllowAny,)
+    )
+    def pantry(self, request):
+        query = PantrySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filterset = self.filterset_class(
+            request.query_params,
+            queryset=Recipe.objects.order_by(),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        params = filterset.form.cleaned_data
+        mode = params.pop('tags_mode') or TAGS_MODE_ANY
+        slugs = params.pop('tags')
+        ids = None
+        if any(value not in EMPTY_VALUES for value in params.values()):
+            ids = filterset.qs.values_list('id', flat=True)
+        found = pantry_index.search(
+            query.validated_data['ingredients'],
+            query.validated_data['max_missing'],
+            tag_ids=tag_ids(slugs, mode) if slugs else None,
+            all_tags=mode == TAGS_MODE_ALL,
+            recipe_ids=ids,
+        )
+        paginator = PageNumberPagination()
+        page = dict(paginator.paginate_queryset(found, request, view=self))
+        recipes = self.get_queryset().in_bulk(page)
+        data = self.get_serializer(
+            [recipes[pk] for pk in page if pk in recipes], many=True
+        ).data
+        for item in data:
+            item['missing'] = page[item['id']]
+        return paginator.get_paginated_response(data)
+
+    @action(
+        detail=False,
+        methods=('GET', ),
+        permission_classes=(IsAuthenticated,)
+    )
+    def feed(self, request):
+        paginator = FeedPagination()
+        keys = paginator.paginate_keys(
+            lambda key, limit: feed_keys(request.user.pk, key, limit),
+            request,
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        serializer = self.get_serializer(
+            [
+                recipes[recipe_id] for _, recipe_id in keys
+                if recipe_id in recipes
+            ],
+            many=True,
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite',
+        url_name='favorite-batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def favorite_batch(self, request):
+        return self.__change_batch(Favorite, request)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_batch(self, request):
+        return self.__change_batch(ShoppingList, request)
+
+    @action(
+        detail=False,
+        methods=('GET', ),
+        permission_classes=(IsAuthenticated,)
+    )
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_lists__user=request.user
+        file_format = request.query_params.get(
+            SHOPPING_LIST_FORMAT_PARAM, 'txt'
+        )
+        if file_format not in SHOPPING_LIST_FORMATS:
+            raise serializers.ValidationError({
+                SHOPPING_LIST_FORMAT_PARAM:
+                    f'Choose one of: {", ".join(SHOPPING_LIST_FORMATS)}'
+            })
+        ingredients = ShoppingCartItem.objects.filter(
+            user=request.user
         ).order_by('ingredient__name').values(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        shoppiing_list = self.__create_txt_cart(ingredients)
-        response = HttpResponse(shoppiing_list, content_type=CONTENT)
-        response['Content-Disposition'] = "attachment; "
-        f"filename='{FILE_SHOPPING_LIST}'"
-        return response
+            'ingredient__measurement_unit',
+            'amount',
+        ).iterator()
+        return shopping_list_response(ingredients, file_format)
 
 
+@method_decorator(ingredient_conditional, name='list')
+@method_decorator(ingredient_conditional, name='retrieve')
 class IngredientViewSet(viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -164,9 +487,35 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get('limit')
+        if limit is not None and not (limit.isdigit() and int(limit)):
+            raise serializers.ValidationError(
+                {'limit': 'Limit must be a positive integer'}
+            )
+        # Тело должно быть не старее версии из ETag этого ответа.
+        return Response(ingredient_index.search(
+            name,
+            int(limit) if limit else None,
+            version=table_validators(request, 'ingredient')[2],
+        ))
+
 
+@method_decorator(tag_conditional, name='list')
+@method_decorator(tag_conditional, name='retrieve')
 class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
@@ -26,7 +26,8 @@ INSTALLED_APPS = [
     'colorfield',
     'import_export',
     'api.apps.ApiConfig',
-    'recipes.apps.RecipesConfig'
+    'recipes.apps.RecipesConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
@@ -118,10 +119,95 @@ REST_FRAMEWORK = {
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ]
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Общий для воркеров кэш токенов и версий состояний зрителей. Файловый по умолчанию виден всем
+    # процессам контейнера; для нескольких контейнеров нужен Redis или
+    # Memcached.
+    'auth': {
+        'BACKEND': os.getenv(
+            'AUTH_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv('AUTH_CACHE_LOCATION', '/tmp/foodgram_auth'),
+    },
+}
+
+# SHARED - алиас из CACHES, сброс токена сразу виден всем воркерам.
+# Пустое значение оставляет только кэш процесса: тогда другие процессы
+# принимают отозванный токен до истечения TTL.
+TOKEN_AUTH_CACHE = {
+    'MAXSIZE': int(os.getenv('TOKEN_AUTH_CACHE_MAXSIZE', 10000)),
+    'TTL': int(os.getenv('TOKEN_AUTH_CACHE_TTL', 60)),
+    'SHARED': os.getenv('TOKEN_AUTH_CACHE_SHARED', 'auth'),
+}
+
+# Избранное, корзина и подписки зрителя в кэше процесса. SHARED - алиас
+# из CACHES с версиями состояний, общими для воркеров; пустое значение
+# выключает кэш, и флаги считаются подзапросами EXISTS.
+VIEWER_STATE_CACHE = {
+    'MAXSIZE': int(os.getenv('VIEWER_STATE_CACHE_MAXSIZE', 10000)),
+    'TTL': int(os.getenv('VIEWER_STATE_CACHE_TTL', 300)),
+    'SHARED': os.getenv('VIEWER_STATE_CACHE_SHARED', 'auth'),
+}
+
+RECIPE_FRAGMENT_CACHE = {
+    'MAX_BYTES': int(os.getenv('RECIPE_FRAGMENT_CACHE_BYTES', 32 * 2 ** 20)),
+}
+
+INGREDIENT_INDEX_CHECK_INTERVAL = int(
+    os.getenv('INGREDIENT_INDEX_CHECK_INTERVAL', 5)
+)
+
+TAG_MAP_CHECK_INTERVAL = int(os.getenv('TAG_MAP_CHECK_INTERVAL', 5))
+
+PANTRY_INDEX = {
+    'CHECK_INTERVAL': int(os.getenv('PANTRY_INDEX_CHECK_INTERVAL', 5)),
+    # Запас по времени на транзакции, закоммиченные позже соседних.
+    'OVERLAP': int(os.getenv('PANTRY_INDEX_OVERLAP', 60)),
+}
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+IMAGE_UPLOAD = {
+    'MAX_BYTES': int(os.getenv('IMAGE_UPLOAD_MAX_BYTES', 10 * 2 ** 20)),
+    'MAX_PIXELS': int(os.getenv('IMAGE_UPLOAD_MAX_PIXELS', 40_000_000)),
+    'CHUNK_SIZE': 64 * 2 ** 10,
+}
+
+FEED = {
+    'FANOUT_MAX_FOLLOWERS': int(
+        os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 10000)
+    ),
+    'BACKFILL_RECIPES': int(os.getenv('FEED_BACKFILL_RECIPES', 50)),
+}
+
+# После изменения NUM_PERM, BANDS или SEED нужен rebuild_similar_index.
+SIMILAR_RECIPES = {
+    'NUM_PERM': 64,
+    'BANDS': 32,
+    'SEED': 1,
+    'CANDIDATES': int(os.getenv('SIMILAR_RECIPES_CANDIDATES', 200)),
+}
+
+JOBS = {
+    'ALWAYS_EAGER': os.getenv('JOBS_ALWAYS_EAGER', 'False') == 'True',
+    'MAX_ATTEMPTS': 5,
+    'POLL_INTERVAL': 1,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    'STALE_TIMEOUT': 600,
+}
+
 DJOSER = {
     'PERMISSIONS': {
         'user_list': ['rest_framework.permissions.AllowAny'],
@@ -134,4 +220,5 @@ DJOSER = {
     },
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
+    'LOGOUT_ON_PASSWORD_CHANGE': True,
 }
@@ -5,3 +5,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food_back.settings')
 
 application = get_wsgi_application()
+
+from api.indexes import (  # noqa: E402
+    ingredient_index,
+    pantry_index,
+    tag_map,
+)
+
+ingredient_index.warm()
+pantry_index.warm()
+tag_map.warm()
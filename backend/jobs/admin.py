@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'user',
+        'modified',
+    )
+    search_fields = ('name', 'user__username')
+    list_filter = ('status', 'name')
+    readonly_fields = ('error', 'traceback', 'lease_expires')
+    empty_value_display = '-пусто-'
@@ -0,0 +1,81 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connections
+
+from jobs.worker import requeue_stale, work, work_in_process
+
+
+class Command(BaseCommand):
+    help = 'Запуск обработчиков фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Пул потоков или процессов',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOBS['POLL_INTERVAL'],
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь: {requeued}')
+        workers, poll_interval = options['workers'], options['poll_interval']
+        self.stdout.write(self.style.SUCCESS(
+            f'Запущено обработчиков: {workers} ({options["pool"]})'
+        ))
+        if options['pool'] == 'process':
+            self.run_processes(workers, poll_interval)
+        else:
+            self.run_threads(workers, poll_interval)
+
+    @staticmethod
+    def run_threads(workers, poll_interval):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        threads = [
+            threading.Thread(target=work, args=(number, stop, poll_interval))
+            for number in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                stop.wait(1)
+        except KeyboardInterrupt:
+            stop.set()
+        for thread in threads:
+            thread.join()
+
+    @staticmethod
+    def run_processes(workers, poll_interval):
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=work_in_process, args=(number, poll_interval)
+            )
+            for number in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        signal.signal(
+            signal.SIGTERM,
+            lambda *args: [process.terminate() for process in processes],
+        )
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
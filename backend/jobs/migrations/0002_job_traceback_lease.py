@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-19 09:45
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def split_errors(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    jobs = Job.objects.exclude(error='').only('error')
+    for job in jobs.iterator():
+        job.traceback = job.error
+        job.error = job.error.strip().splitlines()[-1].split(':')[0]
+        job.save(update_fields=('error', 'traceback'))
+    Job.objects.filter(status='running').update(
+        lease_expires=models.F('modified') + timedelta(
+            seconds=settings.JOBS['STALE_TIMEOUT']
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Аренда истекает'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='traceback',
+            field=models.TextField(blank=True, verbose_name='Трассировка ошибки'),
+        ),
+        migrations.RunPython(split_errors, migrations.RunPython.noop),
+    ]
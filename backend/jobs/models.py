@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=5,
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Последняя ошибка', blank=True)
+    traceback = models.TextField('Трассировка ошибки', blank=True)
+    worker = models.CharField('Обработчик', max_length=100, blank=True)
+    lease_expires = models.DateTimeField(
+        'Аренда истекает',
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='jobs',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Пользователь',
+    )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    modified = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk} {self.status}'
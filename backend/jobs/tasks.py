@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+TASKS = {}
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, user=None, run_at=None, max_attempts=None):
+    if name not in TASKS:
+        raise KeyError(f'Unknown job {name}')
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS['MAX_ATTEMPTS'],
+    )
+    if settings.JOBS['ALWAYS_EAGER']:
+        from jobs.worker import run_job
+        transaction.on_commit(lambda: run_job(job.pk, 'eager'))
+    return job
+
+
+def enqueue_many(name, payloads, user=None):
+    """Ставит в очередь пачку однотипных задач одним запросом."""
+    if settings.JOBS['ALWAYS_EAGER']:
+        return [enqueue(name, payload, user=user) for payload in payloads]
+    if name not in TASKS:
+        raise KeyError(f'Unknown job {name}')
+    now = timezone.now()
+    return Job.objects.bulk_create(
+        Job(
+            name=name,
+            payload=payload,
+            user=user,
+            run_at=now,
+            max_attempts=settings.JOBS['MAX_ATTEMPTS'],
+        )
+        for payload in payloads
+    )
@@ -0,0 +1,156 @@
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.tasks import TASKS
+
+CLAIM_BATCH = 10
+
+
+def worker_name(number):
+    return f'{socket.gethostname()}:{os.getpid()}:{number}'
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(
+        settings.JOBS['BACKOFF_BASE'] * 2 ** (attempts - 1),
+        settings.JOBS['BACKOFF_MAX'],
+    ))
+
+
+def lease():
+    return timezone.now() + timedelta(seconds=settings.JOBS['STALE_TIMEOUT'])
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи с истёкшей арендой.
+
+    Аренду выдаёт claim, так что задачу упавшего обработчика подхватит
+    любой другой при следующем опросе очереди.
+    """
+    return Job.objects.filter(
+        status=Job.RUNNING, lease_expires__lt=timezone.now()
+    ).update(status=Job.QUEUED, lease_expires=None, modified=timezone.now())
+
+
+def renew_lease(job_id, worker):
+    """Продлевает аренду, если задача всё ещё у этого обработчика."""
+    return Job.objects.filter(
+        pk=job_id, status=Job.RUNNING, worker=worker
+    ).update(lease_expires=lease())
+
+
+def heartbeat(job_id, worker, stop):
+    """Продлевает аренду каждую треть STALE_TIMEOUT, пока не выставлен stop.
+
+    Без продления задача дольше STALE_TIMEOUT вернулась бы в очередь
+    и выполнилась второй раз параллельно первой.
+    """
+    try:
+        while not stop.wait(settings.JOBS['STALE_TIMEOUT'] / 3):
+            renew_lease(job_id, worker)
+    finally:
+        connection.close()
+
+
+def claim(worker):
+    """Атомарно забирает одну готовую к запуску задачу.
+
+    Условный UPDATE по статусу работает одинаково в Postgres и SQLite:
+    из нескольких обработчиков задачу получает только один.
+    """
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).order_by('run_at', 'id').values_list('id', flat=True)[:CLAIM_BATCH]
+    for job_id in candidates:
+        if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            lease_expires=lease(),
+            modified=timezone.now(),
+        ):
+            return job_id
+    return None
+
+
+def run_job(job_id, worker):
+    """Выполняет задачу и сохраняет итог.
+
+    Наружу (в Job.error и /api/jobs/) попадает только класс исключения,
+    трассировка остаётся в Job.traceback для админки. Пока задача
+    выполняется, аренду продлевает heartbeat. Итог сохраняется, только
+    если аренду не забрал другой обработчик.
+    """
+    job = Job.objects.get(pk=job_id)
+    if job.status != Job.RUNNING:
+        Job.objects.filter(pk=job_id).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            lease_expires=lease(),
+        )
+        job.refresh_from_db()
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=heartbeat, args=(job_id, worker, stop), daemon=True
+    )
+    beat.start()
+    try:
+        result = TASKS[job.name](**job.payload)
+    except Exception as error:
+        job.error = type(error).__name__
+        job.traceback = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.error = job.traceback = ''
+    finally:
+        stop.set()
+        beat.join()
+    Job.objects.filter(
+        pk=job_id, status=Job.RUNNING, worker=worker
+    ).update(
+        status=job.status,
+        run_at=job.run_at,
+        result=job.result,
+        error=job.error,
+        traceback=job.traceback,
+        lease_expires=None,
+        modified=timezone.now(),
+    )
+    return job
+
+
+def work(number, stop, poll_interval):
+    """Цикл одного обработчика: берёт задачи, пока не выставлен stop."""
+    worker = worker_name(number)
+    while not stop.is_set():
+        close_old_connections()
+        requeue_stale()
+        job_id = claim(worker)
+        if job_id is None:
+            stop.wait(poll_interval)
+            continue
+        run_job(job_id, worker)
+
+
+def work_in_process(number, poll_interval):
+    stop = threading.Event()
+    try:
+        work(number, stop, poll_interval)
+    except KeyboardInterrupt:
+        pass
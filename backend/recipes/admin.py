@@ -10,6 +10,9 @@ from recipes.models import (
     User,
     Tag
 )
+from recipes.cart import recipe_amounts, sync_recipe
+from recipes.images import generate_variants
+from recipes.signals import recipe_saved
 
 
 @admin.register(Follow)
@@ -44,9 +47,21 @@ class RecipeAdmin(admin.ModelAdmin):
     verbose_name = 'Рецепты',
     inlines = (RecipeIngredientInline, )
 
-    @admin.display(description='Добавлений в избранное')
+    @admin.display(
+        description='Добавлений в избранное', ordering='favorites_count'
+    )
     def count_favorite(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = recipe_amounts((form.instance.pk,))
+        super().save_related(request, form, formsets, change)
+        sync_recipe(form.instance, old_amounts)
+        if 'image' in form.changed_data:
+            generate_variants(form.instance)
+        recipe_saved.send(
+            sender=Recipe, instance=form.instance, created=not change
+        )
 
 
 @admin.register(Ingredient)
@@ -104,7 +119,9 @@ class UserAdmin(admin.ModelAdmin):
         'email',
         'is_staff',
         'is_superuser',
-        'is_active'
+        'is_active',
+        'recipes_count',
+        'followers_count',
     )
     list_filter = (
         ("is_staff", admin.BooleanFieldListFilter),
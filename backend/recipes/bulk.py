@@ -0,0 +1,114 @@
+from django.db import connection
+
+from recipes.models import Follow, User
+
+
+def quoted(*names):
+    return ', '.join(connection.ops.quote_name(name) for name in names)
+
+
+def insert_ignoring_conflicts(
+    model, columns, select_sql, params, returning, conflict=None
+):
+    """INSERT ... SELECT ... ON CONFLICT DO NOTHING одним запросом.
+
+    Конфликт проверяется по conflict (по умолчанию по columns), на них
+    должно быть ограничение уникальности. Возвращает значения столбца
+    returning у вставленных строк (кортежи, если returning - кортеж
+    столбцов), уже существовавшие строки пропускаются.
+    """
+    names = returning if isinstance(returning, tuple) else (returning,)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quoted(model._meta.db_table)} ({quoted(*columns)}) '
+            f'{select_sql} ON CONFLICT ({quoted(*conflict or columns)}) '
+            f'DO NOTHING RETURNING {quoted(*names)}',
+            params,
+        )
+        rows = cursor.fetchall()
+    if isinstance(returning, tuple):
+        return rows
+    return [row[0] for row in rows]
+
+
+def delete_returning(model, where_sql, params, returning):
+    """DELETE ... RETURNING, возвращает значения столбца returning."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quoted(model._meta.db_table)} WHERE {where_sql} '
+            f'RETURNING {quoted(returning)}',
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def link(model, user_id, target, queryset):
+    """Связывает user_id со всеми объектами queryset через model.
+
+    Возвращает id объектов, связь с которыми появилась только сейчас.
+    """
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    # WHERE обязателен: без него SQLite принимает ON CONFLICT за часть
+    # SELECT.
+    return insert_ignoring_conflicts(
+        model,
+        ('user_id', target),
+        f'SELECT %s, chosen.id FROM ({sql}) chosen WHERE 1 = 1',
+        (user_id, *params),
+        target,
+    )
+
+
+def unlink(model, user_id, target, queryset):
+    """Удаляет связи user_id с объектами queryset, возвращает их id."""
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    return delete_returning(
+        model,
+        f'{quoted("user_id")} = %s AND {quoted(target)} IN ({sql})',
+        (user_id, *params),
+        target,
+    )
+
+
+def link_recipes(model, user_id, recipes):
+    """Добавляет рецепты из queryset в избранное или корзину user_id."""
+    return link(model, user_id, 'recipe_id', recipes)
+
+
+def unlink_recipes(model, user_id, recipes):
+    return unlink(model, user_id, 'recipe_id', recipes)
+
+
+def follow_authors(user_id, authors):
+    """Подписывает user_id на авторов из queryset, кроме него самого."""
+    return link(Follow, user_id, 'author_id', authors.exclude(pk=user_id))
+
+
+def unfollow_authors(user_id, authors):
+    return unlink(Follow, user_id, 'author_id', authors)
+
+
+def import_follows(edges, field='username'):
+    """Вставляет пары (подписчик, автор), заданные значениями field.
+
+    Пары сопоставляются с пользователями одним запросом; неизвестные
+    пользователи, подписки на себя и существующие подписки пропускаются
+    на стороне базы. Возвращает (id, user_id, author_id) новых подписок.
+    """
+    edges = list(edges)
+    if not edges:
+        return []
+    column = quoted(User._meta.get_field(field).column)
+    users = quoted(User._meta.db_table)
+    values = ', '.join(['(%s, %s)'] * len(edges))
+    return insert_ignoring_conflicts(
+        Follow,
+        ('user_id', 'author_id'),
+        f'WITH edge (follower, author) AS (VALUES {values}) '
+        f'SELECT DISTINCT follower.id, author.id FROM edge '
+        f'JOIN {users} follower ON follower.{column} = edge.follower '
+        f'JOIN {users} author ON author.{column} = edge.author '
+        f'WHERE follower.id <> author.id',
+        [value for edge in edges for value in edge],
+        ('id', 'user_id', 'author_id'),
+    )
@@ -0,0 +1,113 @@
+from collections import Counter
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from recipes.models import RecipeIngredient, ShoppingCartItem, ShoppingList
+
+
+def recipe_amounts(recipe_ids):
+    """Суммарное количество каждого ингредиента в указанных рецептах."""
+    return Counter(dict(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).values(
+            'ingredient_id'
+        ).annotate(total=Sum('amount')).values_list('ingredient_id', 'total')
+    ))
+
+
+def change_carts(user_ids, deltas):
+    """Прибавляет deltas (ингредиент -> количество) к спискам покупок."""
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not deltas:
+        return
+    user_ids = list(user_ids)
+    ShoppingCartItem.objects.bulk_create(
+        (
+            ShoppingCartItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=0
+            )
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items() if delta > 0
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingCartItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    items.update(amount=F('amount') + Case(
+        *(
+            When(ingredient_id=ingredient_id, then=Value(delta))
+            for ingredient_id, delta in deltas.items()
+        ),
+        output_field=IntegerField(),
+    ))
+    items.filter(amount__lte=0).delete()
+
+
+def add_recipes(user_id, recipe_ids):
+    change_carts((user_id,), recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    change_carts((user_id,), {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_ids).items()
+    })
+
+
+def change_recipe(recipe, deltas):
+    """Прибавляет изменения количеств ингредиентов рецепта к спискам."""
+    change_carts(
+        ShoppingList.objects.filter(recipe=recipe).values_list(
+            'user_id', flat=True
+        ),
+        deltas,
+    )
+
+
+def sync_recipe(recipe, old_amounts):
+    """Переносит изменение ингредиентов рецепта в списки покупок."""
+    deltas = recipe_amounts((recipe.pk,))
+    deltas.subtract(old_amounts)
+    change_recipe(recipe, deltas)
+
+
+def expected_items(user_ids):
+    return RecipeIngredient.objects.filter(
+        recipe__shopping_lists__user_id__in=user_ids
+    ).values(
+        'recipe__shopping_lists__user_id', 'ingredient_id'
+    ).annotate(total=Sum('amount')).values_list(
+        'recipe__shopping_lists__user_id', 'ingredient_id', 'total'
+    )
+
+
+def find_drift(user_ids):
+    """Пользователи, чей список покупок расходится с корзиной."""
+    expected = {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in expected_items(user_ids)
+    }
+    actual = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in ShoppingCartItem.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'ingredient_id', 'amount')
+    }
+    return {
+        user_id for user_id, ingredient_id in expected.keys() | actual.keys()
+        if expected.get((user_id, ingredient_id))
+        != actual.get((user_id, ingredient_id))
+    }
+
+
+def rebuild_carts(user_ids):
+    ShoppingCartItem.objects.filter(user_id__in=user_ids).delete()
+    ShoppingCartItem.objects.bulk_create(
+        ShoppingCartItem(
+            user_id=user_id, ingredient_id=ingredient_id, amount=total
+        )
+        for user_id, ingredient_id, total in expected_items(user_ids)
+    )
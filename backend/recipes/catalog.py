@@ -0,0 +1,81 @@
+import csv
+import json
+import unicodedata
+
+from django.db import transaction
+
+from recipes.models import Ingredient, Recipe, TableVersion
+from recipes.search import index_recipes
+from recipes.signals import touch_recipes
+
+
+def normalize(value):
+    """Схлопывает пробелы и приводит юникод к NFC, регистр сохраняется."""
+    return unicodedata.normalize('NFC', ' '.join(value.split()))
+
+
+def read_catalog(path):
+    """Читает пары (название, единица) из csv или json файла."""
+    with open(path, encoding='utf-8') as file:
+        if str(path).endswith('.json'):
+            rows = json.load(file)
+        else:
+            rows = csv.DictReader(file)
+        for row in rows:
+            yield row['name'], row['measurement_unit']
+
+
+def sync_ingredients(rows, batch_size=1000):
+    """Приводит справочник ингредиентов к содержимому rows.
+
+    Новые ингредиенты вставляются пачками с ON CONFLICT DO NOTHING, так
+    что повторный или параллельный запуск не создаёт дублей. Записи,
+    отличающиеся от файла только регистром или пробелами, обновляются.
+    Возвращает числа добавленных, изменённых и неизменных строк.
+    """
+    exact = set()
+    existing = {}
+    for pk, name, unit in Ingredient.objects.values_list(
+        'pk', 'name', 'measurement_unit'
+    ).iterator():
+        exact.add((name, unit))
+        existing.setdefault(
+            (normalize(name).casefold(), normalize(unit).casefold()), pk
+        )
+    seen = set()
+    created = []
+    updated = []
+    unchanged = 0
+    for name, unit in rows:
+        name, unit = normalize(name), normalize(unit)
+        key = (name.casefold(), unit.casefold())
+        if not name or not unit or key in seen:
+            continue
+        seen.add(key)
+        if (name, unit) in exact:
+            unchanged += 1
+        elif key in existing:
+            updated.append(Ingredient(
+                pk=existing[key], name=name, measurement_unit=unit
+            ))
+        else:
+            created.append(Ingredient(name=name, measurement_unit=unit))
+    with transaction.atomic():
+        before = Ingredient.objects.count()
+        Ingredient.objects.bulk_create(
+            created, batch_size=batch_size, ignore_conflicts=True
+        )
+        added = Ingredient.objects.count() - before
+        Ingredient.objects.bulk_update(
+            updated, ('name', 'measurement_unit'), batch_size=batch_size
+        )
+        if updated:
+            changed_ids = [ingredient.pk for ingredient in updated]
+            touch_recipes(ingredients__in=changed_ids)
+            recipe_ids = Recipe.objects.filter(
+                ingredients__in=changed_ids
+            ).values_list('id', flat=True).distinct()
+            index_recipes(recipe_ids)
+        if added or updated:
+            TableVersion.bump('ingredient')
+    return added, len(updated), unchanged
@@ -4,13 +4,47 @@ MIN_AMOUNT = 1
 MAX_AMOUNT = 3000
 MIN_TIME = 1
 MAX_TIME = 600
-FILE_SHOPPING_LIST = 'shopping_list.txt'
-CONTENT = 'text/plain'
+FILE_SHOPPING_LIST = 'shopping_list'
+SHOPPING_LIST_TITLE = 'Shopping list'
+SHOPPING_LIST_FORMAT_PARAM = 'file_format'
+SHOPPING_LIST_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+    'pdf': 'application/pdf',
+}
 MESSAGE_AMOUNT = 'The amount of ingredient must be from should be from'
 MESSAGE_TIME = 'The cooking time should be from'
 ERROR_AMOUT = f' { MESSAGE_AMOUNT} {MIN_AMOUNT} to {MAX_AMOUNT}.'
 ERROR_COOKING_TIME = f'{MESSAGE_TIME} {MIN_TIME} to {MAX_TIME} minutes.'
 LEN_TEXT = 15
+BATCH_MAX_RECIPES = 100
+BATCH_MAX_USERS = 100
+SIMILAR_RECIPES_LIMIT = 10
+SIMILAR_RECIPES_MAX = 50
+TAGS_MODE_ANY = 'any'
+TAGS_MODE_ALL = 'all'
+TAGS_MODES = (
+    (TAGS_MODE_ANY, 'any of the tags'),
+    (TAGS_MODE_ALL, 'all of the tags'),
+)
+PANTRY_MAX_INGREDIENTS = 100
+PANTRY_MISSING_DEFAULT = 3
+PANTRY_MISSING_MAX = 10
+PAGINATION_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+PAGE_SIZE_MAX = 100
+IMAGE_VARIANTS_DIR = 'recipe/variants'
+IMAGE_VARIANT_SIZES = {
+    'thumbnail': 240,
+    'card': 480,
+    'full': 1200,
+}
+IMAGE_VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True,
+                             'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
 
 COLOR_PALETTE = (
     ('#FFFFFF', 'white', ),
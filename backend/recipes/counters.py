@@ -0,0 +1,47 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Follow, Recipe, User
+
+# Модель со счётчиком, поле счётчика, считаемая модель и её ссылка.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def change_counter(model, field, pks, delta):
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def change_counters(model, field, deltas):
+    """Прибавляет deltas (pk -> изменение), запрос на каждое значение."""
+    by_delta = {}
+    for pk, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(pk)
+    for delta, pks in by_delta.items():
+        change_counter(model, field, pks, delta)
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(Subquery(
+        related_model.objects.filter(
+            **{related_field: OuterRef('pk')}
+        ).order_by().values(related_field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def reconcile_counter(model, field, related_model, related_field):
+    """Исправляет разошедшиеся счётчики, возвращает их количество."""
+    actual = actual_count(related_model, related_field)
+    drifted = model.objects.annotate(actual=actual).exclude(
+        **{field: F('actual')}
+    ).values_list('pk', flat=True)
+    return model.objects.filter(pk__in=list(drifted)).update(
+        **{field: actual}
+    )
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from recipes.bulk import insert_ignoring_conflicts
+from recipes.models import Follow, Recipe, TimelineEntry, User
+
+TIMELINE_COLUMNS = ('user_id', 'recipe_id', 'author_id', 'pub_date')
+TIMELINE_KEY = ('user_id', 'recipe_id')
+
+
+def fan_out(recipe_ids):
+    """Раскладывает новые рецепты по лентам подписчиков их авторов.
+
+    Рецепты авторов с большим числом подписчиков не раскладываются,
+    их лента добирает при чтении.
+    """
+    if not recipe_ids:
+        return 0
+    sql, params = Recipe.objects.filter(
+        pk__in=recipe_ids,
+        author__followers_count__lte=settings.FEED['FANOUT_MAX_FOLLOWERS'],
+    ).order_by().annotate(
+        follower_id=F('author__followings__user_id')
+    ).filter(follower_id__isnull=False).values(
+        'follower_id', 'id', 'author_id', 'pub_date'
+    ).query.sql_with_params()
+    return len(insert_ignoring_conflicts(
+        TimelineEntry,
+        TIMELINE_COLUMNS,
+        'SELECT fanned.follower_id, fanned.id, fanned.author_id, '
+        f'fanned.pub_date FROM ({sql}) fanned WHERE 1 = 1',
+        params,
+        'recipe_id',
+        TIMELINE_KEY,
+    ))
+
+
+def backfill(follows):
+    """Добавляет в ленты последние рецепты авторов из новых подписок."""
+    follows = follows.filter(
+        author__followers_count__lte=settings.FEED['FANOUT_MAX_FOLLOWERS']
+    ).order_by().values('user_id', 'author_id')
+    follows_sql, follows_params = follows.query.sql_with_params()
+    ranked_sql, ranked_params = Recipe.objects.filter(
+        author_id__in=follows.values('author_id')
+    ).order_by().annotate(recipe_rank=Window(
+        RowNumber(),
+        partition_by=(F('author_id'),),
+        order_by=(F('pub_date').desc(), F('id').desc()),
+    )).values(
+        'id', 'author_id', 'pub_date', 'recipe_rank'
+    ).query.sql_with_params()
+    return len(insert_ignoring_conflicts(
+        TimelineEntry,
+        TIMELINE_COLUMNS,
+        'SELECT follow.user_id, ranked.id, ranked.author_id, '
+        f'ranked.pub_date FROM ({follows_sql}) follow '
+        f'JOIN ({ranked_sql}) ranked ON ranked.author_id = follow.author_id '
+        'WHERE ranked.recipe_rank <= %s',
+        (*follows_params, *ranked_params,
+         settings.FEED['BACKFILL_RECIPES']),
+        'recipe_id',
+        TIMELINE_KEY,
+    ))
+
+
+def refill_crossed(author_ids):
+    """Раскладывает рецепты авторов, опустившихся до порога подписчиков.
+
+    Вызывается после отписки. Пока подписчиков было больше порога,
+    новые рецепты автора не раскладывались, и без этого они пропали бы
+    из лент оставшихся подписчиков.
+    """
+    return backfill(Follow.objects.filter(author_id__in=User.objects.filter(
+        pk__in=author_ids,
+        followers_count=settings.FEED['FANOUT_MAX_FOLLOWERS'],
+    ).values('pk')))
+
+
+def drop_authors(user_id, author_ids):
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def before(key):
+    if key is None:
+        return Q()
+    pub_date, recipe_id = key
+    return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=recipe_id)
+
+
+def feed_keys(user_id, key, limit):
+    """Ключи (pub_date, id) рецептов ленты, идущие после key.
+
+    Разложенные при записи рецепты читаются из TimelineEntry, рецепты
+    авторов с большим числом подписчиков - напрямую из Recipe; обе
+    выборки идут по индексам и сливаются.
+    """
+    timeline = TimelineEntry.objects.filter(user_id=user_id)
+    if key is not None:
+        pub_date, recipe_id = key
+        timeline = timeline.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, recipe_id__lt=recipe_id)
+        )
+    keys = set(timeline.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit])
+    popular = Follow.objects.filter(
+        user_id=user_id,
+        author__followers_count__gt=settings.FEED['FANOUT_MAX_FOLLOWERS'],
+    ).values('author_id')
+    keys.update(Recipe.objects.filter(
+        before(key), author_id__in=popular
+    ).order_by('-pub_date', '-id').values_list('pub_date', 'id')[:limit])
+    return sorted(keys, reverse=True)[:limit]
@@ -0,0 +1,73 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.constants import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_SIZES,
+    IMAGE_VARIANTS_DIR,
+)
+from recipes.models import Recipe
+
+
+def build_variants(name):
+    """Сохраняет уменьшенные JPEG и WebP копии картинки из хранилища.
+
+    Не обращается к базе данных, поэтому годится для пула процессов.
+    Возвращает {вариант: {формат: путь в хранилище}}.
+    """
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert('RGB')
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {}
+    for variant, size in IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = {}
+        for fmt, (pil_format, extension, options) in (
+            IMAGE_VARIANT_FORMATS.items()
+        ):
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            path = f'{IMAGE_VARIANTS_DIR}/{stem}/{variant}.{extension}'
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            variants[variant][fmt] = default_storage.save(
+                path, ContentFile(buffer.getvalue())
+            )
+    return variants
+
+
+def save_variants(recipe_id, variants):
+    Recipe.objects.filter(pk=recipe_id).update(
+        image_variants=variants, modified=timezone.now()
+    )
+
+
+def generate_variants(recipe):
+    """Ставит в очередь создание копий, вызывается после загрузки фото."""
+    from jobs.tasks import enqueue
+
+    enqueue(
+        'recipes.generate_image_variants',
+        {'recipe_id': recipe.pk, 'image': recipe.image.name},
+        user=recipe.author,
+    )
+
+
+def variant_urls(variants, request=None):
+    return {
+        variant: {
+            fmt: (
+                request.build_absolute_uri(default_storage.url(path))
+                if request is not None else default_storage.url(path)
+            )
+            for fmt, path in formats.items()
+        }
+        for variant, formats in variants.items()
+    }
@@ -1,19 +1,9 @@
-import csv
-
-from django.core.management import BaseCommand
-
-from recipes.models import Ingredient
+from django.core.management import BaseCommand, call_command
 
 
 class Command(BaseCommand):
     help = 'Импорт ингредиентов из csv файла'
 
     def handle(self, *args, **kwargs):
-        with open(
-            'recipes/data/ingredients.csv', 'r', encoding='utf-8'
-        ) as file:
-            reader = csv.DictReader(file)
-            Ingredient.objects.bulk_create(
-                Ingredient(**row) for row in reader
-            )
+        call_command('sync_ingredients', stdout=self.stdout)
         self.stdout.write(self.style.SUCCESS('Ингредиенты загружены'))
@@ -0,0 +1,133 @@
+import base64
+import io
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+from PIL import Image
+
+from recipes.models import Ingredient, Recipe, Tag, User
+from recipes.transfer import RecipeImporter, export_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер скорости и пикового потребления памяти import_recipes и '
+        'export_recipes. Данные создаются во временной транзакции и '
+        'откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=(1000, 10000)
+        )
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument(
+            '--images',
+            action='store_true',
+            help='Встраивать в записи картинки 200x200',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        pool = None
+        if options['processes'] > 1:
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            pool = multiprocessing.Pool(options['processes'])
+        image = None
+        if options['images']:
+            buffer = io.BytesIO()
+            Image.new('RGB', (200, 200), 'orange').save(buffer, 'JPEG')
+            image = base64.b64encode(buffer.getvalue()).decode()
+        stored = []
+        self.stdout.write(
+            'recipes  import/s  import_peak_mb  export/s  export_peak_mb'
+        )
+        try:
+            for size in options['sizes']:
+                with transaction.atomic():
+                    self.bench(rng, size, image, pool, options, stored)
+                    transaction.set_rollback(True)
+        finally:
+            if pool is not None:
+                pool.close()
+            for name in stored:
+                default_storage.delete(name)
+
+    def bench(self, rng, size, image, pool, options, stored):
+        User.objects.create(
+            username='bench_transfer', email='bench_transfer@localhost'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'bench_transfer{number}',
+                slug=f'bench_transfer{number}',
+            ).slug
+            for number in range(5)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench_transfer{number}', measurement_unit='г')
+            for number in range(200)
+        )
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as source:
+            for number in range(size):
+                source.write(json.dumps({
+                    'name': f'Рецепт {number}',
+                    'text': 'Описание рецепта ' * 20,
+                    'cooking_time': rng.randint(1, 120),
+                    'author': 'bench_transfer',
+                    'tags': rng.sample(tags, 2),
+                    'ingredients': [
+                        {
+                            'name': f'bench_transfer{ingredient}',
+                            'measurement_unit': 'г',
+                            'amount': rng.randint(1, 500),
+                        }
+                        for ingredient in rng.sample(range(200), 6)
+                    ],
+                    'image': (
+                        {'name': 'recipe/bench.jpg', 'data': image}
+                        if image else 'recipe/bench.jpg'
+                    ),
+                }, ensure_ascii=False))
+                source.write('\n')
+            source.seek(0)
+            tracemalloc.start()
+            started = time.perf_counter()
+            importer = RecipeImporter(options['chunk_size'], pool)
+            for _ in importer.run(source):
+                pass
+            import_time = time.perf_counter() - started
+            import_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if image:
+            stored.extend(Recipe.objects.filter(
+                author__username='bench_transfer'
+            ).values_list('image', flat=True))
+        with open(os.devnull, 'w', encoding='utf-8') as output:
+            tracemalloc.start()
+            started = time.perf_counter()
+            for _ in export_recipes(
+                output, options['chunk_size'], images=False
+            ):
+                pass
+            export_time = time.perf_counter() - started
+            export_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        exported = Recipe.objects.count()
+        self.stdout.write(
+            f'{size:7d}  {size / import_time:8.0f}  '
+            f'{import_peak / 2 ** 20:14.1f}  '
+            f'{exported / export_time:8.0f}  '
+            f'{export_peak / 2 ** 20:14.1f}'
+        )
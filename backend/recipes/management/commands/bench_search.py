@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, User
+from recipes.search import index_recipes, search_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени полнотекстового поиска при росте числа рецептов. '
+        'Данные создаются во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=(1000, 5000, 20000)
+        )
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [f'слово{number}' for number in range(5000)]
+        with transaction.atomic():
+            author = User.objects.create(
+                username='bench_search', email='bench_search@localhost'
+            )
+            # Пара (название, единица) уникальна: слова без повторов.
+            Ingredient.objects.bulk_create(
+                Ingredient(name=name, measurement_unit='bench')
+                for name in rng.sample(vocabulary, 200)
+            )
+            ingredients = list(
+                Ingredient.objects.filter(measurement_unit='bench')
+            )
+            created = 0
+            self.stdout.write('recipes  median_ms  p95_ms')
+            for size in sorted(options['sizes']):
+                self.populate(rng, vocabulary, author, ingredients,
+                              size - created)
+                created = size
+                timings = []
+                for _ in range(options['queries']):
+                    query = ' '.join(rng.sample(vocabulary, 2))
+                    started = time.perf_counter()
+                    list(search_recipes(
+                        Recipe.objects.all(), query
+                    ).values_list('id', flat=True)[:20])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f'{size:7d}  {statistics.median(timings):9.2f}  '
+                    f'{timings[int(len(timings) * 0.95) - 1]:6.2f}'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def populate(rng, vocabulary, author, ingredients, count):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=' '.join(rng.sample(vocabulary, 3)),
+                text=' '.join(rng.choices(vocabulary, k=40)),
+                cooking_time=10,
+                image='recipe/bench.jpg',
+            )
+            for _ in range(count)
+        )
+        recipes = list(
+            Recipe.objects.filter(author=author).order_by('-id')[:count]
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients, 5)
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        for start in range(0, len(recipe_ids), 500):
+            index_recipes(recipe_ids[start:start + 500])
@@ -0,0 +1,115 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, User
+from recipes.similar import index_similar, jaccard, similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер полноты и задержки поиска похожих рецептов по сравнению с '
+        'точным перебором. Данные создаются во временной транзакции и '
+        'откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            sets = self.populate(rng, options['size'])
+            recipe_ids = sorted(sets)
+            started = time.perf_counter()
+            for start in range(0, len(recipe_ids), 1000):
+                index_similar(recipe_ids[start:start + 1000])
+            build = time.perf_counter() - started
+            self.stdout.write(
+                f'Индекс: {len(recipe_ids)} рецептов за {build:.1f} с'
+            )
+            timings = []
+            recalls = []
+            limit = options['limit']
+            for recipe_id in rng.sample(recipe_ids, options['queries']):
+                started = time.perf_counter()
+                found = similar_recipes(recipe_id, limit)
+                timings.append((time.perf_counter() - started) * 1000)
+                source = sets[recipe_id]
+                exact = sorted(
+                    (
+                        jaccard(source, ingredients)
+                        for other, ingredients in sets.items()
+                        if other != recipe_id
+                    ),
+                    reverse=True,
+                )[:limit]
+                threshold = exact[-1]
+                recalls.append(sum(
+                    similarity >= threshold for _, similarity in found
+                ) / len(exact))
+            timings.sort()
+            self.stdout.write(
+                f'recall@{limit}: {statistics.mean(recalls):.3f}, '
+                f'median: {statistics.median(timings):.2f} мс, '
+                f'p95: {timings[int(len(timings) * 0.95) - 1]:.2f} мс'
+            )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def populate(rng, size):
+        """Рецепты - вариации базовых блюд, чтобы у них были соседи."""
+        author = User.objects.create(
+            username='bench_similar', email='bench_similar@localhost'
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench_similar{number}', measurement_unit='г')
+            for number in range(2000)
+        )
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith='bench_similar'
+        ).values_list('id', flat=True))
+        weights = [1 / (rank + 1) for rank in range(len(ingredients))]
+        bases = [
+            set(rng.choices(ingredients, weights, k=10))
+            for _ in range(max(size // 20, 1))
+        ]
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name='bench',
+                text='bench',
+                cooking_time=10,
+                image='recipe/bench.jpg',
+            )
+            for _ in range(size)
+        )
+        recipe_ids = Recipe.objects.filter(author=author).values_list(
+            'id', flat=True
+        )
+        sets = {}
+        for recipe_id in recipe_ids:
+            ingredient_set = set(rng.choice(bases))
+            for ingredient in rng.sample(
+                sorted(ingredient_set), rng.randint(0, 3)
+            ):
+                ingredient_set.discard(ingredient)
+                ingredient_set.add(rng.choice(ingredients))
+            sets[recipe_id] = ingredient_set
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id, ingredient_id=ingredient, amount=1
+                )
+                for recipe_id, ingredient_set in sets.items()
+                for ingredient in ingredient_set
+            ),
+            batch_size=5000,
+        )
+        return sets
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.catalog import sync_ingredients
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер синхронизации справочника ингредиентов: первая загрузка, '
+        'повторная и загрузка с другим регистром. Данные создаются во '
+        'временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = [
+            (f'bench ingredient {number}', 'bench')
+            for number in range(options['rows'])
+        ]
+        upper = [(name.upper(), unit) for name, unit in rows]
+        self.stdout.write('run      seconds   added  changed  unchanged')
+        with transaction.atomic():
+            for name, catalog in (
+                ('initial', rows),
+                ('repeat', rows),
+                ('case', upper),
+            ):
+                started = time.perf_counter()
+                added, changed, unchanged = sync_ingredients(
+                    catalog, options['batch_size']
+                )
+                self.stdout.write(
+                    f'{name:7s}  {time.perf_counter() - started:7.2f}  '
+                    f'{added:6d}  {changed:7d}  {unchanged:9d}'
+                )
+            transaction.set_rollback(True)
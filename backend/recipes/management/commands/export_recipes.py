@@ -0,0 +1,54 @@
+import multiprocessing
+import sys
+import time
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from recipes.transfer import export_recipes
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка рецептов в NDJSON файл'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdout')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--no-images',
+            action='store_true',
+            help='Не встраивать картинки, оставить пути в хранилище',
+        )
+        parser.add_argument('--processes', type=int, default=1)
+
+    def handle(self, *args, **options):
+        pool = None
+        if options['processes'] > 1 and not options['no_images']:
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            pool = multiprocessing.Pool(options['processes'])
+        output = (
+            sys.stdout if options['path'] == '-'
+            else open(options['path'], 'w', encoding='utf-8')
+        )
+        started = time.perf_counter()
+        exported = 0
+        try:
+            for exported in export_recipes(
+                output,
+                options['chunk_size'],
+                images=not options['no_images'],
+                pool=pool,
+            ):
+                elapsed = time.perf_counter() - started
+                self.stderr.write(
+                    f'{exported} рецептов, {exported / elapsed:.0f}/с'
+                )
+        finally:
+            if output is not sys.stdout:
+                output.close()
+            if pool is not None:
+                pool.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено рецептов: {exported}'
+        ))
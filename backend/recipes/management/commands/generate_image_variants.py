@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from recipes.images import build_variants, save_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий фото для уже загруженных рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для рецептов, у которых они уже есть',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        pending = list(recipes.values_list('id', 'image'))
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            futures = {
+                pool.submit(build_variants, image): recipe_id
+                for recipe_id, image in pending
+            }
+            for future in as_completed(futures):
+                recipe_id = futures[future]
+                try:
+                    save_variants(recipe_id, future.result())
+                    done += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'Рецепт {recipe_id}: {error}')
+                if (done + failed) % 100 == 0:
+                    self.stdout.write(f'{done + failed}/{len(pending)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {done}, ошибок: {failed}'
+        ))
@@ -0,0 +1,60 @@
+import csv
+import time
+from collections import Counter
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.bulk import import_follows
+from recipes.counters import change_counters
+from recipes.feed import backfill
+from recipes.models import Follow, User
+from recipes.signals import relations_changed
+from recipes.transfer import chunked
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт подписок из csv файла со столбцами follower и author. '
+        'Пользователи задаются именем, почтой или id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--by', choices=('username', 'email', 'id'), default='username'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        field = options['by']
+        convert = int if field == 'id' else str.strip
+        read = inserted = 0
+        started = time.perf_counter()
+        with open(options['path'], encoding='utf-8') as file:
+            edges = (
+                (convert(row['follower']), convert(row['author']))
+                for row in csv.DictReader(file)
+            )
+            for chunk in chunked(edges, options['chunk_size']):
+                with transaction.atomic():
+                    created = import_follows(chunk, field)
+                    change_counters(User, 'followers_count', Counter(
+                        author_id for _, _, author_id in created
+                    ))
+                    if created:
+                        backfill(Follow.objects.filter(
+                            pk__in=[follow_id for follow_id, _, _ in created]
+                        ))
+                        relations_changed.send(sender=Follow, user_ids={
+                            user_id for _, user_id, _ in created
+                        })
+                read += len(chunk)
+                inserted += len(created)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{read} пар, {read / elapsed:.0f}/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено подписок: {inserted}, пропущено: {read - inserted}'
+        ))
@@ -0,0 +1,47 @@
+import multiprocessing
+import sys
+import time
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from recipes.transfer import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из NDJSON файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin')
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--processes', type=int, default=1)
+
+    def handle(self, *args, **options):
+        pool = None
+        if options['processes'] > 1:
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            pool = multiprocessing.Pool(options['processes'])
+        source = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        importer = RecipeImporter(
+            options['chunk_size'], pool, report=self.stderr.write
+        )
+        started = time.perf_counter()
+        try:
+            for imported in importer.run(source):
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{imported} рецептов, {imported / elapsed:.0f}/с'
+                )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if pool is not None:
+                pool.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {importer.imported}, '
+            f'ошибок: {importer.error_count}'
+        ))
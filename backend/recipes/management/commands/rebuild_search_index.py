@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeTerm
+from recipes.search import index_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересборка поискового индекса рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        )
+        with transaction.atomic():
+            RecipeTerm.objects.all().delete()
+            for start in range(0, len(recipe_ids), chunk_size):
+                index_recipes(recipe_ids[start:start + chunk_size])
+                self.stdout.write(
+                    f'{min(start + chunk_size, len(recipe_ids))}'
+                    f'/{len(recipe_ids)}'
+                )
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересобран'))
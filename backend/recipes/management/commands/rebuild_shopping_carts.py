@@ -0,0 +1,45 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.cart import find_drift, rebuild_carts
+from recipes.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка сохранённых списков покупок с корзинами пользователей '
+        'и пересборка разошедшихся'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересобрать списки всех пользователей без сверки',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(
+            User.objects.order_by('id').values_list('id', flat=True)
+        )
+        drifted = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            with transaction.atomic():
+                broken = chunk if options['all'] else find_drift(chunk)
+                drifted += len(broken)
+                if broken and not options['verify_only']:
+                    rebuild_carts(broken)
+        if options['verify_only']:
+            self.stdout.write(f'Расхождений: {drifted}')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано списков покупок: {drifted}'
+        ))
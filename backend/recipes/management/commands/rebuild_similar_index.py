@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from recipes.similar import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = 'Полная перестройка индекса похожих рецептов (MinHash LSH)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_similar(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {indexed}'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+
+from recipes.counters import COUNTERS, reconcile_counter
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление счётчиков избранного, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            fixed = reconcile_counter(
+                model, field, related_model, related_field
+            )
+            self.stdout.write(f'{model.__name__}.{field}: {fixed}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сверены'))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from recipes.catalog import read_catalog, sync_ingredients
+
+DEFAULT_PATH = settings.BASE_DIR / 'recipes' / 'data' / 'ingredients.csv'
+
+
+class Command(BaseCommand):
+    help = 'Синхронизация справочника ингредиентов с csv или json файлом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DEFAULT_PATH)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        added, changed, unchanged = sync_ingredients(
+            read_catalog(options['path']), options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено: {added}, изменено: {changed}, '
+            f'без изменений: {unchanged}'
+        ))
@@ -0,0 +1,50 @@
+# Generated by Django 3.2 on 2026-10-18 18:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_cart_items(apps, schema_editor):
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingCartItem = apps.get_model('recipes', 'ShoppingCartItem')
+    ShoppingCartItem.objects.bulk_create(
+        ShoppingCartItem(
+            user_id=user_id, ingredient_id=ingredient_id, amount=total
+        )
+        for user_id, ingredient_id, total in RecipeIngredient.objects.values(
+            'recipe__shopping_lists__user_id', 'ingredient_id'
+        ).filter(recipe__shopping_lists__isnull=False).annotate(
+            total=models.Sum('amount')
+        ).values_list(
+            'recipe__shopping_lists__user_id', 'ingredient_id', 'total'
+        ).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipeterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Продукт в списке покупок',
+                'verbose_name_plural': 'Продукты в списках покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_item'),
+        ),
+        migrations.RunPython(fill_cart_items, migrations.RunPython.noop),
+    ]
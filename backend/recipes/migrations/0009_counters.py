@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 18:13
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    counters = (
+        ('Recipe', 'favorites_count', 'Favorite', 'recipe'),
+        ('User', 'recipes_count', 'Recipe', 'author'),
+        ('User', 'followers_count', 'Follow', 'author'),
+    )
+    for model_name, field, related_name, related_field in counters:
+        related_model = apps.get_model('recipes', related_name)
+        apps.get_model('recipes', model_name).objects.update(**{
+            field: Coalesce(models.Subquery(
+                related_model.objects.filter(
+                    **{related_field: models.OuterRef('pk')}
+                ).order_by().values(related_field).annotate(
+                    total=models.Count('pk')
+                ).values('total')
+            ), 0)
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_shoppingcartitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+# recipes.constants.MAX_AMOUNT на момент миграции.
+MAX_AMOUNT = 3000
+
+
+def merge_recipe_rows(RecipeIngredient, ingredient_id):
+    """Сливает повторы ингредиента в одном рецепте, складывая количества."""
+    repeated = RecipeIngredient.objects.filter(
+        ingredient_id=ingredient_id
+    ).values('recipe_id').annotate(
+        kept=models.Min('pk'),
+        amount=models.Sum('amount'),
+        total=models.Count('pk'),
+    ).filter(total__gt=1)
+    for row in repeated:
+        RecipeIngredient.objects.filter(pk=row['kept']).update(
+            amount=min(row['amount'], MAX_AMOUNT)
+        )
+        RecipeIngredient.objects.filter(
+            recipe_id=row['recipe_id'], ingredient_id=ingredient_id
+        ).exclude(pk=row['kept']).delete()
+
+
+def dedupe_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingCartItem = apps.get_model('recipes', 'ShoppingCartItem')
+    duplicated = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        kept=models.Min('pk'), total=models.Count('pk')
+    ).filter(total__gt=1)
+    for group in duplicated:
+        extra = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(pk=group['kept']).values_list('pk', flat=True))
+        RecipeIngredient.objects.filter(ingredient_id__in=extra).update(
+            ingredient_id=group['kept']
+        )
+        merge_recipe_rows(RecipeIngredient, group['kept'])
+        for item in ShoppingCartItem.objects.filter(
+            ingredient_id__in=extra
+        ):
+            kept = ShoppingCartItem.objects.filter(
+                user_id=item.user_id, ingredient_id=group['kept']
+            ).update(amount=models.F('amount') + item.amount)
+            if kept:
+                item.delete()
+            else:
+                item.ingredient_id = group['kept']
+                item.save(update_fields=('ingredient',))
+        Ingredient.objects.filter(pk__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+PREFIX_INDEX = 'recipes_ingredient_name_upper_prefix'
+
+
+def create_prefix_index(apps, schema_editor):
+    # istartswith в Postgres сравнивает UPPER(name::text) через LIKE,
+    # такой индекс может использовать только text_pattern_ops.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {PREFIX_INDEX} ON recipes_ingredient '
+        '(UPPER(name::text) text_pattern_ops)'
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {PREFIX_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_dedupe_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
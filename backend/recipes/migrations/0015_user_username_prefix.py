@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 21:40
+
+from django.db import migrations
+
+PREFIX_INDEX = 'recipes_user_username_upper_prefix'
+
+
+def create_prefix_index(apps, schema_editor):
+    # Поиск ?username= идёт через istartswith, см. 0012_ingredient_unique.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {PREFIX_INDEX} ON recipes_user '
+        '(UPPER(username::text) text_pattern_ops)'
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {PREFIX_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_similarity_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
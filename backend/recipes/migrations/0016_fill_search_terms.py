@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-19 09:10
+
+import re
+from collections import Counter
+
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+# Копия recipes.search на момент миграции: изменения поиска не должны
+# менять то, что делает эта миграция.
+TOKEN = re.compile(r'\w{2,}')
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+
+def recipe_terms(name, text, ingredient_names, max_length):
+    def tokenize(value):
+        return [
+            token[:max_length] for token in TOKEN.findall(value.casefold())
+        ]
+
+    weights = Counter()
+    for token in tokenize(name):
+        weights[token] += NAME_WEIGHT
+    for ingredient_name in ingredient_names:
+        for token in tokenize(ingredient_name):
+            weights[token] += INGREDIENT_WEIGHT
+    for token in tokenize(text):
+        weights[token] += TEXT_WEIGHT
+    return weights
+
+
+def fill_search_terms(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    RecipeTerm = apps.get_model('recipes', 'RecipeTerm')
+    max_length = RecipeTerm._meta.get_field('term').max_length
+    last_id = 0
+    while True:
+        recipes = list(Recipe.objects.filter(pk__gt=last_id).filter(
+            search_terms__isnull=True
+        ).order_by('pk').values_list('pk', 'name', 'text')[:CHUNK_SIZE])
+        if not recipes:
+            return
+        last_id = recipes[-1][0]
+        ingredient_names = {}
+        for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=[recipe[0] for recipe in recipes]
+        ).values_list('recipe_id', 'ingredient__name'):
+            ingredient_names.setdefault(recipe_id, []).append(name)
+        RecipeTerm.objects.bulk_create(
+            RecipeTerm(recipe_id=recipe_id, term=term, weight=weight)
+            for recipe_id, name, text in recipes
+            for term, weight in recipe_terms(
+                name, text, ingredient_names.get(recipe_id, ()), max_length
+            ).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_user_username_prefix'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
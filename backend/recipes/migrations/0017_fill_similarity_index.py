@@ -0,0 +1,90 @@
+# Generated by Django 3.2 on 2026-10-19 09:30
+
+import hashlib
+import random
+import struct
+
+from django.db import migrations
+
+CHUNK_SIZE = 1000
+# Копия recipes.similar с настройками SIMILAR_RECIPES на момент
+# миграции. После их смены нужен rebuild_similar_index.
+PRIME = (1 << 61) - 1
+NUM_PERM = 64
+BANDS = 32
+SEED = 1
+
+
+def permutations():
+    rng = random.Random(SEED)
+    return [
+        (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+        for _ in range(NUM_PERM)
+    ]
+
+
+def signature(ingredient_ids, hashes):
+    return [
+        min(column) for column in zip(*(
+            [(a * ingredient + b) % PRIME for a, b in hashes]
+            for ingredient in ingredient_ids
+        ))
+    ]
+
+
+def band_buckets(values):
+    rows = len(values) // BANDS
+    return [
+        struct.unpack('<q', hashlib.blake2b(
+            struct.pack(f'<{rows}Q', *values[start:start + rows]),
+            digest_size=8,
+        ).digest())[0]
+        for start in range(0, rows * BANDS, rows)
+    ]
+
+
+def fill_similarity_index(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    RecipeSignature = apps.get_model('recipes', 'RecipeSignature')
+    RecipeBucket = apps.get_model('recipes', 'RecipeBucket')
+    hashes = permutations()
+    last_id = 0
+    while True:
+        recipe_ids = list(Recipe.objects.filter(pk__gt=last_id).filter(
+            signature__isnull=True
+        ).order_by('pk').values_list('pk', flat=True)[:CHUNK_SIZE])
+        if not recipe_ids:
+            return
+        last_id = recipe_ids[-1]
+        sets = {}
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            sets.setdefault(recipe_id, set()).add(ingredient_id)
+        signatures = {
+            recipe_id: signature(ingredients, hashes)
+            for recipe_id, ingredients in sets.items()
+        }
+        RecipeSignature.objects.bulk_create(
+            RecipeSignature(recipe_id=recipe_id, signature=values)
+            for recipe_id, values in signatures.items()
+        )
+        RecipeBucket.objects.bulk_create(
+            RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+            for recipe_id, values in signatures.items()
+            for band, bucket in enumerate(band_buckets(values))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_fill_search_terms'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fill_similarity_index, migrations.RunPython.noop
+        ),
+    ]
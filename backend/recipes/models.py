@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from colorfield.fields import ColorField
 
 from recipes.constants import (
@@ -46,6 +47,16 @@ class User(AbstractUser):
         max_length=200,
         help_text='Укажите адрес электронной почты',
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
 
@@ -73,6 +84,12 @@ class Ingredient(models. Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name[:LEN_TEXT]
@@ -184,17 +201,38 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         help_text='Укажите дату публикации',
     )
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     image = models.ImageField(
         upload_to='recipe',
         verbose_name='Фото блюда',
         help_text='Добавьте фото готового блюда',
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     is_published = models.BooleanField(default=True)
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date'
+            )
+        ]
 
     def __str__(self):
         return self.name[:LEN_TEXT]
@@ -283,3 +321,189 @@ class ShoppingList(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} shop {self.recipe}'
+
+
+class ShoppingCartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='cart_items',
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        related_name='cart_items',
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+    )
+    amount = models.IntegerField('Количество')
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списках покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_cart_item'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} buy {self.ingredient} {self.amount}'
+
+
+class RecipeTerm(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='search_terms',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    term = models.CharField(
+        'Слово',
+        max_length=100,
+        db_index=True,
+    )
+    weight = models.PositiveIntegerField('Вес')
+
+    class Meta:
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'term'],
+                name='unique_recipe_term'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.term} {self.recipe_id}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Автор рецепта',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='timeline_user_pub_date'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user_id} {self.recipe_id}'
+
+
+class RecipeSignature(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        related_name='signature',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    signature = models.JSONField('MinHash подпись')
+
+    class Meta:
+        verbose_name = 'Подпись рецепта'
+        verbose_name_plural = 'Подписи рецептов'
+
+    def __str__(self) -> str:
+        return str(self.recipe_id)
+
+
+class RecipeBucket(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='similarity_buckets',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    band = models.PositiveSmallIntegerField('Полоса')
+    bucket = models.BigIntegerField('Корзина')
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'band'],
+                name='unique_recipe_band'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket'],
+                name='recipe_bucket_band'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.band}:{self.bucket} {self.recipe_id}'
+
+
+class TableVersion(models.Model):
+    name = models.CharField(
+        'Таблица',
+        unique=True,
+        max_length=50,
+    )
+    version = models.PositiveBigIntegerField(
+        'Версия',
+        default=0,
+    )
+    modified = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = 'Версия таблицы'
+        verbose_name_plural = 'Версии таблиц'
+
+    def __str__(self) -> str:
+        return f'{self.name} v{self.version}'
+
+    @classmethod
+    def bump(cls, name):
+        updated = cls.objects.filter(name=name).update(
+            version=models.F('version') + 1,
+            modified=timezone.now(),
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(name=name, version=1)
+            except IntegrityError:
+                cls.bump(name)
@@ -0,0 +1,98 @@
+import math
+import re
+from collections import Counter
+
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+
+from recipes.models import Recipe, RecipeIngredient, RecipeTerm
+
+TOKEN = re.compile(r'\w{2,}')
+MAX_TERM_LENGTH = RecipeTerm._meta.get_field('term').max_length
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN.findall(text.casefold())
+    ]
+
+
+def recipe_terms(name, text, ingredient_names):
+    weights = Counter()
+    for token in tokenize(name):
+        weights[token] += NAME_WEIGHT
+    for ingredient_name in ingredient_names:
+        for token in tokenize(ingredient_name):
+            weights[token] += INGREDIENT_WEIGHT
+    for token in tokenize(text):
+        weights[token] += TEXT_WEIGHT
+    return weights
+
+
+def index_recipes(recipe_ids):
+    """Пересобирает слова поискового индекса для указанных рецептов."""
+    recipe_ids = list(recipe_ids)
+    ingredient_names = {}
+    for recipe_id, name in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient__name'):
+        ingredient_names.setdefault(recipe_id, []).append(name)
+    RecipeTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeTerm.objects.bulk_create(
+        RecipeTerm(recipe_id=recipe_id, term=term, weight=weight)
+        for recipe_id, name, text in Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', 'name', 'text')
+        for term, weight in recipe_terms(
+            name, text, ingredient_names.get(recipe_id, ())
+        ).items()
+    )
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по словам запроса и сортирует по TF-IDF."""
+    terms = set(tokenize(query))
+    if not terms:
+        return queryset
+    frequencies = dict(
+        RecipeTerm.objects.filter(term__in=terms).values('term').annotate(
+            frequency=Count('id')
+        ).values_list('term', 'frequency')
+    )
+    if not frequencies:
+        return queryset.none()
+    total = Recipe.objects.count()
+    idf = Case(
+        *(
+            When(term=term, then=Value(math.log(1 + total / frequency)))
+            for term, frequency in frequencies.items()
+        ),
+        output_field=FloatField(),
+    )
+    rank = RecipeTerm.objects.filter(
+        recipe=OuterRef('pk'), term__in=frequencies
+    ).values('recipe').annotate(
+        rank=Sum(ExpressionWrapper(
+            F('weight') * idf, output_field=FloatField()
+        ))
+    ).values('rank')
+    return queryset.filter(id__in=RecipeTerm.objects.filter(
+        term__in=frequencies
+    ).values('recipe_id')).annotate(
+        search_rank=Subquery(rank, output_field=FloatField())
+    ).order_by(
+        '-search_rank', '-pub_date', 'id'
+    )
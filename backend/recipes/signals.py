@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from recipes.models import (
+    Favorite,
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingList,
+    TableVersion,
+    Tag,
+)
+from recipes.cart import add_recipes, remove_recipes
+from recipes.counters import change_counter
+from recipes.feed import backfill, drop_authors, fan_out, refill_crossed
+from recipes.search import index_recipes
+from recipes.similar import index_similar
+
+User = get_user_model()
+
+# Рецепт сохранён вместе с тегами и ингредиентами (API или админка).
+# changed - множество изменённых полей, None если неизвестно.
+recipe_saved = Signal()
+# Избранное, корзина или подписки изменены в обход сигналов моделей
+# (массовые вставки и удаления). user_ids - затронутые пользователи.
+relations_changed = Signal()
+SEARCHABLE = frozenset(('name', 'text', 'ingredients'))
+
+
+def touch_recipes(**lookups):
+    Recipe.objects.filter(**lookups).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    touch_recipes(pk=instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        touch_recipes(pk=instance.pk)
+    elif pk_set:
+        touch_recipes(pk__in=pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    touch_recipes(tags=instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_table_changed(sender, **kwargs):
+    TableVersion.bump('tag')
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes(ingredients=instance)
+        index_recipes(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_table_changed(sender, **kwargs):
+    TableVersion.bump('ingredient')
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    touch_recipes(author=instance)
+
+
+@receiver(recipe_saved)
+def update_search_index(sender, instance, changed=None, **kwargs):
+    if changed is None or changed & SEARCHABLE:
+        index_recipes((instance.pk,))
+
+
+@receiver(recipe_saved)
+def update_similar_index(sender, instance, changed=None, **kwargs):
+    if changed is None or 'ingredients' in changed:
+        index_similar((instance.pk,))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, 'favorites_count', (instance.recipe_id,), 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    change_counter(Recipe, 'favorites_count', (instance.recipe_id,), -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, 'recipes_count', (instance.author_id,), 1)
+        fan_out((instance.pk,))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(sender, instance, **kwargs):
+    change_counter(User, 'recipes_count', (instance.author_id,), -1)
+    TableVersion.bump('recipe')
+
+
+@receiver(pre_save, sender=ShoppingList)
+def cart_entry_changing(sender, instance, **kwargs):
+    # Запись могут перевести на другой рецепт или пользователя (админка).
+    instance.previous_entry = ShoppingList.objects.filter(
+        pk=instance.pk
+    ).values_list('user_id', 'recipe_id').first() if instance.pk else None
+
+
+@receiver(post_save, sender=ShoppingList)
+def cart_entry_saved(sender, instance, **kwargs):
+    previous = getattr(instance, 'previous_entry', None)
+    if previous == (instance.user_id, instance.recipe_id):
+        return
+    if previous is not None:
+        remove_recipes(previous[0], (previous[1],))
+    add_recipes(instance.user_id, (instance.recipe_id,))
+
+
+# pre_delete, а не post_delete: при удалении рецепта его ингредиенты
+# к post_delete записей корзины могут быть уже удалены.
+@receiver(pre_delete, sender=ShoppingList)
+def cart_entry_deleted(sender, instance, **kwargs):
+    remove_recipes(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, 'followers_count', (instance.author_id,), 1)
+        backfill(Follow.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(sender, instance, **kwargs):
+    change_counter(User, 'followers_count', (instance.author_id,), -1)
+    drop_authors(instance.user_id, (instance.author_id,))
+    refill_crossed((instance.author_id,))
@@ -0,0 +1,152 @@
+import hashlib
+import random
+import struct
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from recipes.models import (
+    Recipe,
+    RecipeBucket,
+    RecipeIngredient,
+    RecipeSignature,
+)
+
+# Простое число Мерсенна 2**61 - 1 для универсального хеширования.
+PRIME = (1 << 61) - 1
+
+
+@lru_cache(maxsize=None)
+def permutations(count, seed):
+    rng = random.Random(seed)
+    return tuple(
+        (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+        for _ in range(count)
+    )
+
+
+# Хеши ингредиента - массив из NUM_PERM 64-битных чисел, около 0.5 КБ;
+# кэш покрывает обычный справочник ингредиентов целиком.
+@lru_cache(maxsize=4096)
+def ingredient_hashes(ingredient_id, count, seed):
+    return array('Q', (
+        (a * ingredient_id + b) % PRIME
+        for a, b in permutations(count, seed)
+    ))
+
+
+def signature(ingredient_ids):
+    """MinHash подпись множества ингредиентов, список из NUM_PERM чисел."""
+    config = settings.SIMILAR_RECIPES
+    return [
+        min(column) for column in zip(*(
+            ingredient_hashes(ingredient, config['NUM_PERM'], config['SEED'])
+            for ingredient in ingredient_ids
+        ))
+    ]
+
+
+def band_buckets(values):
+    """Хеши полос подписи: BANDS знаковых 64-битных чисел."""
+    rows = len(values) // settings.SIMILAR_RECIPES['BANDS']
+    return [
+        struct.unpack('<q', hashlib.blake2b(
+            struct.pack(f'<{rows}Q', *values[start:start + rows]),
+            digest_size=8,
+        ).digest())[0]
+        for start in range(0, rows * settings.SIMILAR_RECIPES['BANDS'], rows)
+    ]
+
+
+def ingredient_sets(recipe_ids):
+    sets = {}
+    for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient_id'):
+        sets.setdefault(recipe_id, set()).add(ingredient_id)
+    return sets
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+@transaction.atomic
+def index_similar(recipe_ids):
+    """Пересчитывает подписи и корзины LSH указанных рецептов."""
+    recipe_ids = list(recipe_ids)
+    sets = ingredient_sets(recipe_ids)
+    RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+    signatures = {
+        recipe_id: signature(ingredients)
+        for recipe_id, ingredients in sets.items()
+    }
+    RecipeSignature.objects.bulk_create(
+        RecipeSignature(recipe_id=recipe_id, signature=values)
+        for recipe_id, values in signatures.items()
+    )
+    RecipeBucket.objects.bulk_create(
+        RecipeBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+        for recipe_id, values in signatures.items()
+        for band, bucket in enumerate(band_buckets(values))
+    )
+
+
+def similar_recipes(recipe_id, limit):
+    """Ближайшие по Jaccard рецепты: [(id рецепта, сходство)].
+
+    Кандидаты - рецепты, совпавшие с исходным хотя бы в одной полосе
+    LSH; лучшие из них по числу совпавших полос переранжируются по
+    точному Jaccard множеств ингредиентов.
+    """
+    buckets = RecipeBucket.objects.filter(recipe_id=recipe_id).values_list(
+        'band', 'bucket'
+    )
+    lookup = Q()
+    for band, bucket in buckets:
+        lookup |= Q(band=band, bucket=bucket)
+    if not lookup:
+        return []
+    candidates = list(RecipeBucket.objects.filter(lookup).exclude(
+        recipe_id=recipe_id
+    ).values('recipe_id').annotate(
+        shared=Count('id')
+    ).order_by('-shared').values_list(
+        'recipe_id', flat=True
+    )[:settings.SIMILAR_RECIPES['CANDIDATES']])
+    sets = ingredient_sets([recipe_id, *candidates])
+    source = sets.get(recipe_id, set())
+    ranked = sorted(
+        (
+            (jaccard(source, sets.get(candidate, set())), candidate)
+            for candidate in candidates
+        ),
+        key=lambda item: (-item[0], item[1]),
+    )
+    return [
+        (candidate, similarity)
+        for similarity, candidate in ranked[:limit] if similarity > 0
+    ]
+
+
+def rebuild_similar(chunk_size=1000):
+    """Строит индекс заново пачками рецептов, возвращает их число."""
+    RecipeBucket.objects.all().delete()
+    RecipeSignature.objects.all().delete()
+    last_id = 0
+    indexed = 0
+    while True:
+        recipe_ids = list(Recipe.objects.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:chunk_size])
+        if not recipe_ids:
+            return indexed
+        index_similar(recipe_ids)
+        indexed += len(recipe_ids)
+        last_id = recipe_ids[-1]
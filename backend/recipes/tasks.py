@@ -0,0 +1,12 @@
+from jobs.tasks import task
+from recipes.images import build_variants, save_variants
+from recipes.models import Recipe
+
+
+@task('recipes.generate_image_variants')
+def generate_image_variants(recipe_id, image):
+    if not Recipe.objects.filter(pk=recipe_id, image=image).exists():
+        return None
+    variants = build_variants(image)
+    save_variants(recipe_id, variants)
+    return variants
@@ -0,0 +1,324 @@
+import base64
+import binascii
+import json
+import uuid
+from collections import Counter
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from jobs.tasks import enqueue_many
+from recipes.counters import change_counters
+from recipes.feed import fan_out
+from recipes.constants import MAX_AMOUNT, MAX_TIME, MIN_AMOUNT, MIN_TIME
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+from recipes.search import index_recipes
+from recipes.similar import index_similar
+
+RecipeTag = Recipe.tags.through
+NAME_MAX_LENGTH = Recipe._meta.get_field('name').max_length
+# Сколько первых ошибок импорта хранится для итогового отчёта.
+ERROR_SAMPLE_SIZE = 20
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_image(name):
+    with default_storage.open(name) as file:
+        return base64.b64encode(file.read()).decode()
+
+
+def store_image(image):
+    """Декодирует картинку из выгрузки и сохраняет её в хранилище.
+
+    Картинка - путь в хранилище, data URI или {'name', 'data'} с base64.
+    Не обращается к базе данных, поэтому годится для пула процессов.
+    """
+    if isinstance(image, str) and image.startswith('data:'):
+        header, _, data = image.partition(',')
+        if not header.endswith(';base64') or '/' not in header:
+            raise ValueError('неверный data URI картинки')
+        extension = header[len('data:'):-len(';base64')].split('/')[-1]
+        image = {'name': f'recipe/{uuid.uuid4().hex}.{extension}',
+                 'data': data}
+    if isinstance(image, str):
+        return image
+    return default_storage.save(image['name'], ContentFile(
+        base64.b64decode(image['data'], validate=True)
+    ))
+
+
+def try_store_image(image):
+    """store_image, возвращающий (путь, None) или (None, ошибка)."""
+    try:
+        return store_image(image), None
+    except (binascii.Error, KeyError, OSError, TypeError,
+            ValueError) as error:
+        return None, f'картинка: {error!r}'
+
+
+def export_recipes(output, chunk_size, images=True, pool=None):
+    """Пишет рецепты в output в формате NDJSON, по строке на рецепт.
+
+    Рецепты читаются пачками по первичному ключу, поэтому память не
+    зависит от размера таблицы. Генератор возвращает число записанных
+    рецептов после каждой пачки.
+    """
+    last_id = 0
+    exported = 0
+    while True:
+        recipes = list(Recipe.objects.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values(
+            'pk',
+            'name',
+            'text',
+            'cooking_time',
+            'pub_date',
+            'image',
+            'author__username',
+        )[:chunk_size])
+        if not recipes:
+            return
+        recipe_ids = [recipe['pk'] for recipe in recipes]
+        last_id = recipe_ids[-1]
+        tags = {}
+        for recipe_id, slug in RecipeTag.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'tag__slug'):
+            tags.setdefault(recipe_id, []).append(slug)
+        ingredients = {}
+        for recipe_id, name, unit, amount in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list(
+            'recipe_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount',
+        ):
+            ingredients.setdefault(recipe_id, []).append(
+                {'name': name, 'measurement_unit': unit, 'amount': amount}
+            )
+        names = [recipe['image'] for recipe in recipes]
+        if images:
+            data = (pool.map if pool else map)(encode_image, names)
+            names = [
+                {'name': name, 'data': encoded}
+                for name, encoded in zip(names, data)
+            ]
+        for recipe, image in zip(recipes, names):
+            output.write(json.dumps({
+                'name': recipe['name'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'pub_date': recipe['pub_date'].isoformat(),
+                'author': recipe['author__username'],
+                'tags': tags.get(recipe['pk'], []),
+                'ingredients': ingredients.get(recipe['pk'], []),
+                'image': image,
+            }, ensure_ascii=False))
+            output.write('\n')
+        exported += len(recipes)
+        yield exported
+
+
+class RecipeImporter:
+    """Загружает рецепты из NDJSON пачками через bulk_create.
+
+    Справочники тегов и ингредиентов читаются один раз, авторы - для
+    каждой пачки, так что память ограничена размером пачки. Картинки
+    декодируются в пуле процессов, если он передан.
+
+    Ошибки передаются в report по мере появления; хранятся только их
+    число и первые ERROR_SAMPLE_SIZE сообщений.
+    """
+
+    def __init__(self, chunk_size, pool=None, report=None):
+        self.chunk_size = chunk_size
+        self.pool = pool
+        self.report = report
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                'pk', 'name', 'measurement_unit'
+            )
+        }
+        self.imported = 0
+        self.error_count = 0
+        self.error_sample = []
+
+    def error(self, line_number, message):
+        message = f'Строка {line_number}: {message}'
+        self.error_count += 1
+        if len(self.error_sample) < ERROR_SAMPLE_SIZE:
+            self.error_sample.append(message)
+        if self.report is not None:
+            self.report(message)
+
+    def run(self, lines):
+        """Генератор, возвращает число загруженных рецептов после пачки."""
+        for number, chunk in enumerate(chunked(lines, self.chunk_size)):
+            records = []
+            for offset, line in enumerate(chunk):
+                line_number = number * self.chunk_size + offset + 1
+                if not line.strip():
+                    continue
+                try:
+                    records.append(
+                        (line_number, self.parse(json.loads(line)))
+                    )
+                except KeyError as error:
+                    self.error(line_number, f'не найдено {error}')
+                except (ValueError, TypeError) as error:
+                    self.error(line_number, error)
+            if records:
+                self.save(records)
+            yield self.imported
+
+    def parse(self, record):
+        if not 0 < len(record['name']) <= NAME_MAX_LENGTH:
+            raise ValueError(
+                f'name должно быть от 1 до {NAME_MAX_LENGTH} символов'
+            )
+        if not record['ingredients']:
+            raise ValueError('нет ингредиентов')
+        return {
+            'name': record['name'],
+            'text': record['text'],
+            'cooking_time': in_range(
+                record['cooking_time'], MIN_TIME, MAX_TIME, 'cooking_time'
+            ),
+            'pub_date': parse_datetime(record.get('pub_date') or ''),
+            'author': record['author'],
+            'tags': [self.tags[slug] for slug in record['tags']],
+            'ingredients': [
+                (
+                    self.ingredients[(
+                        ingredient['name'], ingredient['measurement_unit']
+                    )],
+                    in_range(
+                        ingredient['amount'], MIN_AMOUNT, MAX_AMOUNT, 'amount'
+                    ),
+                )
+                for ingredient in record['ingredients']
+            ],
+            'image': record['image'],
+        }
+
+    def save(self, records):
+        authors = dict(User.objects.filter(
+            username__in={record['author'] for _, record in records}
+        ).values_list('username', 'id'))
+        for line_number, record in records:
+            if record['author'] not in authors:
+                self.error(line_number, f'нет автора {record["author"]}')
+        records = [
+            (line_number, record) for line_number, record in records
+            if record['author'] in authors
+        ]
+        images = (self.pool.map if self.pool else map)(
+            try_store_image, [record['image'] for _, record in records]
+        )
+        stored = []
+        for (line_number, record), (image, error) in zip(records, images):
+            if error is not None:
+                self.error(line_number, error)
+            else:
+                stored.append((record, image))
+        # Файлы, записанные для этой пачки (не ссылки на существующие).
+        new_images = [
+            image for record, image in stored if image != record['image']
+        ]
+        records = [record for record, _ in stored]
+        recipes = [
+            Recipe(
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                author_id=authors[record['author']],
+                image=image,
+            )
+            for record, image in stored
+        ]
+        if not recipes:
+            return
+        try:
+            self.save_recipes(recipes, records)
+        except Exception:
+            # Пачка откатилась: её картинки никому не нужны.
+            for image in new_images:
+                default_storage.delete(image)
+            raise
+        self.imported += len(recipes)
+
+    @staticmethod
+    @transaction.atomic
+    def save_recipes(recipes, records):
+        """Сохраняет пачку рецептов со связями одной транзакцией."""
+        created(recipes)
+        dated = []
+        for recipe, record in zip(recipes, records):
+            if record['pub_date'] is not None:
+                recipe.pub_date = record['pub_date']
+                dated.append(recipe)
+        Recipe.objects.bulk_update(dated, ('pub_date',))
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, record in zip(recipes, records)
+            for tag_id in set(record['tags'])
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe_id=recipe.pk, ingredient_id=pk, amount=amount
+            )
+            for recipe, record in zip(recipes, records)
+            for pk, amount in record['ingredients']
+        )
+        recipe_ids = [recipe.pk for recipe in recipes]
+        index_recipes(recipe_ids)
+        index_similar(recipe_ids)
+        fan_out(recipe_ids)
+        change_counters(User, 'recipes_count', Counter(
+            recipe.author_id for recipe in recipes
+        ))
+        enqueue_many('recipes.generate_image_variants', [
+            {'recipe_id': recipe.pk, 'image': recipe.image.name}
+            for recipe in recipes
+        ])
+
+
+def in_range(value, minimum, maximum, field):
+    """bulk_create не вызывает валидаторы модели, границы проверяются тут."""
+    value = int(value)
+    if not minimum <= value <= maximum:
+        raise ValueError(f'{field} должно быть от {minimum} до {maximum}')
+    return value
+
+
+def created(recipes):
+    """bulk_create, после которого у объектов заполнены первичные ключи.
+
+    Postgres возвращает ключи сам. В SQLite запись выполняется под
+    блокировкой базы, поэтому последние ключи таблицы принадлежат
+    только что вставленным строкам.
+    """
+    Recipe.objects.bulk_create(recipes)
+    if connection.features.can_return_rows_from_bulk_insert:
+        return
+    pks = Recipe.objects.order_by('-pk').values_list('pk', flat=True)[
+        :len(recipes)
+    ]
+    for recipe, pk in zip(recipes, list(pks)[::-1]):
+        recipe.pk = pk